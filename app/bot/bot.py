@@ -1,14 +1,32 @@
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters
+from telegram.ext import AIORateLimiter, Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters
+from telegram.request import HTTPXRequest
 from app.config import settings
-from app.bot.handlers import start, prayer_times, callback_handler
+from app.bot.handlers import start, prayer_times, callback_handler, error_handler
 
 def create_bot_application():
-    application = Application.builder().token(settings.BOT_TOKEN).build()
+    # Separate pools so the long-poll getUpdates call can't starve outbound sends
+    request = HTTPXRequest(
+        connection_pool_size=settings.CONNECTION_POOL_SIZE,
+        pool_timeout=settings.POOL_TIMEOUT
+    )
+    updates_request = HTTPXRequest(
+        connection_pool_size=settings.UPDATES_POOL_SIZE,
+        pool_timeout=settings.POOL_TIMEOUT
+    )
 
-    # Essential handlers
-    application.add_handler(CommandHandler("start", start.start_command))
-    application.add_handler(CommandHandler("prayer", prayer_times.prayer_command))
-    application.add_handler(CommandHandler("location", prayer_times.location_command))
+    application = (
+        Application.builder()
+        .token(settings.BOT_TOKEN)
+        .request(request)
+        .get_updates_request(updates_request)
+        .rate_limiter(AIORateLimiter(overall_max_rate=30, overall_time_period=1, max_retries=3))
+        .build()
+    )
+
+    # Essential handlers (non-blocking so a slow DB/API call doesn't stall other chats)
+    application.add_handler(CommandHandler("start", start.start_command, block=False))
+    application.add_handler(CommandHandler("prayer", prayer_times.prayer_command, block=False))
+    application.add_handler(CommandHandler("location", prayer_times.location_command, block=False))
 
     # TODO: Re-enable after fixing task/team imports
     # application.add_handler(CommandHandler("tasks", tasks.tasks_command))
@@ -19,8 +37,10 @@ def create_bot_application():
     # application.add_handler(CommandHandler("jointeam", teams.join_team_command))
     # application.add_handler(CommandHandler("settings", settings_handler.settings_command))
 
-    application.add_handler(CallbackQueryHandler(callback_handler.callback_query_handler))
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, start.message_handler))
+    application.add_handler(CallbackQueryHandler(callback_handler.callback_query_handler, block=False))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, start.message_handler, block=False))
+
+    application.add_error_handler(error_handler.error_handler)
 
     return application
 
@@ -0,0 +1,8 @@
+"""Shared service instances for python-telegram-bot handlers"""
+
+from app.services.user_service import UserService
+from app.services.prayer_service import PrayerService
+
+# Created once per process so the HTTP client and its connection pool are reused
+user_service = UserService()
+prayer_service = PrayerService()
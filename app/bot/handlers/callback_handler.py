@@ -1,26 +1,59 @@
 """Callback query handlers for python-telegram-bot"""
 
+import asyncio
 import logging
+import time
 from telegram import Update
 from telegram.ext import ContextTypes
-from app.services.user_service import UserService
-from app.services.prayer_service import PrayerService
+from app.bot.handlers import user_service, prayer_service
 from app.bot.keyboards import get_prayer_keyboard
 
 logger = logging.getLogger(__name__)
 
+# Repeat presses of the same button inside this window are ignored
+DUPLICATE_PRESS_WINDOW = 2.0
+_MAX_RECENT_PRESSES = 10_000
+
+# (user_id, callback_data) -> time of last handled press
+_recent_presses = {}
+
+
+def _is_duplicate_press(user_id: int, data: str) -> bool:
+    """Record a button press and report whether it repeats a very recent one"""
+    key = (user_id, data)
+    now = time.monotonic()
+
+    if now - _recent_presses.get(key, 0.0) < DUPLICATE_PRESS_WINDOW:
+        return True
+
+    if len(_recent_presses) > _MAX_RECENT_PRESSES:
+        stale = [k for k, ts in _recent_presses.items() if now - ts >= DUPLICATE_PRESS_WINDOW]
+        for k in stale:
+            del _recent_presses[k]
+
+    _recent_presses[key] = now
+    return False
+
 
 async def callback_query_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle callback queries"""
     query = update.callback_query
-    await query.answer()
 
-    if query.data == "show_prayer_times":
-        await handle_show_prayer_times(update, context)
-    elif query.data == "prayer_today":
-        await handle_show_prayer_times(update, context)
-    else:
-        await query.edit_message_text("❌ Noma'lum buyruq.")
+    if _is_duplicate_press(query.from_user.id, query.data):
+        await query.answer("⏳")
+        return
+
+    # Acknowledge the button press while the handler does its DB/API lookups
+    answer_task = asyncio.create_task(query.answer())
+
+    try:
+        handler = _CALLBACK_ROUTES.get(query.data)
+        if handler is None:
+            await query.edit_message_text("❌ Noma'lum buyruq.")
+        else:
+            await handler(update, context)
+    finally:
+        await answer_task
 
 
 async def handle_show_prayer_times(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -28,39 +61,34 @@ async def handle_show_prayer_times(update: Update, context: ContextTypes.DEFAULT
     query = update.callback_query
     user_id = query.from_user.id
 
-    user_service = UserService()
-    prayer_service = PrayerService()
-
-    try:
-        # Get user
-        user = await user_service.get_user_by_telegram_id(user_id)
-
-        if not user:
-            await query.edit_message_text("❌ Foydalanuvchi topilmadi. Iltimos /start bosing.")
-            return
+    # Get user
+    user = await user_service.get_user_by_telegram_id(user_id)
 
-        # Get user's prayer region or default to Toshkent
-        region = getattr(user, 'prayer_region', None) or "Toshkent"
+    if not user:
+        await query.edit_message_text("❌ Foydalanuvchi topilmadi. Iltimos /start bosing.")
+        return
 
-        # Get prayer times
-        prayer_times = await prayer_service.get_prayer_times(region)
+    # Get user's prayer region or default to Toshkent
+    region = user.prayer_region or "Toshkent"
 
-        if not prayer_times:
-            await query.edit_message_text("❌ Namaz vaqtlarini olishda xatolik yuz berdi.")
-            return
+    # Get prayer times
+    prayer_times = await prayer_service.get_prayer_times(region)
 
-        # Format and display
-        formatted_times = prayer_service.format_for_display(prayer_times, region)
-
-        await query.edit_message_text(
-            formatted_times,
-            reply_markup=get_prayer_keyboard(),
-            parse_mode="Markdown"
-        )
-
-    except Exception as e:
-        logger.error(f"Failed to get prayer times: {e}")
+    if not prayer_times:
         await query.edit_message_text("❌ Namaz vaqtlarini olishda xatolik yuz berdi.")
-
-    finally:
-        await prayer_service.close()
\ No newline at end of file
+        return
+
+    # Format and display
+    formatted_times = prayer_service.format_for_display(prayer_times, region)
+
+    await query.edit_message_text(
+        formatted_times,
+        reply_markup=get_prayer_keyboard(),
+        parse_mode="Markdown"
+    )
+
+# callback_data -> handler
+_CALLBACK_ROUTES = {
+    "show_prayer_times": handle_show_prayer_times,
+    "prayer_today": handle_show_prayer_times,
+}
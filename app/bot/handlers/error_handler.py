@@ -0,0 +1,18 @@
+"""Global error handler for python-telegram-bot"""
+
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+
+logger = logging.getLogger(__name__)
+
+
+async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
+    """Log handler exceptions and let the user know something went wrong"""
+    logger.error("Exception while handling an update", exc_info=context.error)
+
+    if isinstance(update, Update) and update.effective_message:
+        try:
+            await update.effective_message.reply_text("❌ Xatolik yuz berdi. Iltimos, qaytadan urinib ko'ring.")
+        except Exception as send_error:
+            logger.error(f"Failed to send error message: {send_error}")
@@ -1,13 +1,9 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from app.services.user_service import UserService
-from app.services.prayer_service import PrayerService
+from app.bot.handlers import user_service, prayer_service
 from app.bot.keyboards import get_prayer_keyboard
 
 async def prayer_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_service = UserService()
-    prayer_service = PrayerService()
-
     user = await user_service.get_user_by_telegram_id(update.effective_user.id)
 
     if not user:
@@ -18,7 +14,7 @@ async def prayer_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Get user's region or default to Toshkent
-    region = getattr(user, 'prayer_region', None) or "Toshkent"
+    region = user.prayer_region or "Toshkent"
 
     prayer_times = await prayer_service.get_prayer_times(region)
 
@@ -46,8 +42,6 @@ async def location_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_service = UserService()
-
     if update.message.location:
         location = update.message.location
         latitude = str(location.latitude)
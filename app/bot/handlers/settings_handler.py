@@ -1,10 +1,19 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from app.services.user_service import UserService
+from app.bot.handlers import user_service
 from app.bot.keyboards import get_settings_keyboard
 
+_SETTINGS_TEMPLATE = (
+    "⚙️ *Your Settings*\n\n"
+    "*Location:* {location}\n"
+    "*Timezone:* {timezone}\n"
+    "*Language:* {language}\n"
+    "*Prayer Notifications:* {prayer_notifications}\n"
+    "{offset}"
+    "\nUse the buttons below to update your settings."
+)
+
 async def settings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_service = UserService()
     user = await user_service.get_user_by_telegram_id(update.effective_user.id)
 
     if not user:
@@ -13,16 +22,13 @@ async def settings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    settings_text = f"⚙️ *Your Settings*\n\n"
-    settings_text += f"*Location:* {user.location or 'Not set'}\n"
-    settings_text += f"*Timezone:* {user.timezone}\n"
-    settings_text += f"*Language:* {user.language_code.upper()}\n"
-    settings_text += f"*Prayer Notifications:* {'✅ Enabled' if user.prayer_notifications else '❌ Disabled'}\n"
-
-    if user.prayer_notifications:
-        settings_text += f"*Notification Offset:* {user.notification_offset} minutes before\n"
-
-    settings_text += "\nUse the buttons below to update your settings."
+    settings_text = _SETTINGS_TEMPLATE.format_map({
+        "location": user.location or 'Not set',
+        "timezone": user.timezone,
+        "language": user.language_code.upper(),
+        "prayer_notifications": '✅ Enabled' if user.prayer_notifications else '❌ Disabled',
+        "offset": f"*Notification Offset:* {user.notification_offset} minutes before\n" if user.prayer_notifications else "",
+    })
 
     await update.message.reply_text(
         settings_text,
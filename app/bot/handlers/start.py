@@ -1,13 +1,14 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from app.services.user_service import UserService
+from app.bot.handlers import user_service
+from app.bot.handlers.prayer_times import prayer_command
 from app.bot.keyboards import get_main_keyboard
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
 
-    user_service = UserService()
-    await user_service.create_or_update_user(
+    # Save in the background so the welcome message isn't held up by the DB
+    user_service.schedule_create_or_update_user(
         telegram_id=user.id,
         username=user.username,
         first_name=user.first_name,
@@ -34,40 +35,47 @@ Use the buttons below to get started, or type /help for more commands.
         reply_markup=get_main_keyboard()
     )
 
+async def _reply_tasks_stub(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text("✅ Tasks feature coming soon!")
+
+async def _reply_teams_stub(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text("👥 Teams feature coming soon!")
+
+async def _reply_settings_stub(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text("⚙️ Settings feature coming soon!")
+
+# Main keyboard buttons -> handler
+_BUTTON_DISPATCH = {
+    "🕌 Prayer Times": prayer_command,
+    "✅ My Tasks": _reply_tasks_stub,
+    "👥 Teams": _reply_teams_stub,
+    "⚙️ Settings": _reply_settings_stub,
+}
+
+# Keyword groups checked in order, first match wins
+_KEYWORD_REPLIES = (
+    (("prayer", "salah", "namaz"), "🕌 Use /prayer to get prayer times for your location!"),
+    (("task", "todo", "work"), "✅ Use /tasks to manage your tasks or /newtask to create a new one!"),
+    (("team", "group", "collaborate"), "👥 Use /team to manage your teams or /createteam to create a new one!"),
+)
+
 async def message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = update.message.text
 
     # Handle main keyboard buttons
-    if text == "🕌 Prayer Times":
-        from app.bot.handlers.prayer_times import prayer_command
-        await prayer_command(update, context)
-        return
-    elif text == "✅ My Tasks":
-        await update.message.reply_text("✅ Tasks feature coming soon!")
-        return
-    elif text == "👥 Teams":
-        await update.message.reply_text("👥 Teams feature coming soon!")
-        return
-    elif text == "⚙️ Settings":
-        await update.message.reply_text("⚙️ Settings feature coming soon!")
+    button_handler = _BUTTON_DISPATCH.get(text)
+    if button_handler:
+        await button_handler(update, context)
         return
 
     # Handle text keywords
     text_lower = text.lower()
-    if any(keyword in text_lower for keyword in ['prayer', 'salah', 'namaz']):
-        await update.message.reply_text(
-            "🕌 Use /prayer to get prayer times for your location!"
-        )
-    elif any(keyword in text_lower for keyword in ['task', 'todo', 'work']):
-        await update.message.reply_text(
-            "✅ Use /tasks to manage your tasks or /newtask to create a new one!"
-        )
-    elif any(keyword in text_lower for keyword in ['team', 'group', 'collaborate']):
-        await update.message.reply_text(
-            "👥 Use /team to manage your teams or /createteam to create a new one!"
-        )
-    else:
-        await update.message.reply_text(
-            "I didn't understand that. Use /help to see available commands.",
-            reply_markup=get_main_keyboard()
-        )
\ No newline at end of file
+    for keywords, reply in _KEYWORD_REPLIES:
+        if any(keyword in text_lower for keyword in keywords):
+            await update.message.reply_text(reply)
+            return
+
+    await update.message.reply_text(
+        "I didn't understand that. Use /help to see available commands.",
+        reply_markup=get_main_keyboard()
+    )
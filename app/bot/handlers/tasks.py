@@ -5,6 +5,9 @@ from app.services.user_service import UserService
 from app.models.task import TaskPriority, TaskStatus
 from app.bot.keyboards import get_task_keyboard, get_task_status_keyboard
 
+_PENDING_STATUSES = frozenset({TaskStatus.TODO, TaskStatus.IN_PROGRESS})
+_MAX_PENDING_SHOWN = 5
+
 async def tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
         "✅ *Task Management*\n\n"
@@ -26,73 +29,64 @@ async def new_task_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     task_text = " ".join(context.args)
 
-    if " | " in task_text:
-        title, description = task_text.split(" | ", 1)
-    else:
-        title = task_text
-        description = ""
+    title, _, description = task_text.partition(" | ")
 
     task_service = TaskService()
 
-    try:
-        task = await task_service.create_task(
-            title=title.strip(),
-            description=description.strip(),
-            created_by=update.effective_user.id,
-            priority=TaskPriority.MEDIUM
-        )
-
-        formatted_task = task_service.format_task(task)
+    task = await task_service.create_task(
+        title=title.strip(),
+        description=description.strip(),
+        created_by=update.effective_user.id,
+        priority=TaskPriority.MEDIUM
+    )
 
-        await update.message.reply_text(
-            f"✅ *Task Created Successfully!*\n\n{formatted_task}",
-            parse_mode="Markdown"
-        )
+    formatted_task = task_service.format_task(task)
 
-    except Exception as e:
-        await update.message.reply_text(
-            f"❌ Error creating task: {str(e)}"
-        )
+    await update.message.reply_text(
+        f"✅ *Task Created Successfully!*\n\n{formatted_task}",
+        parse_mode="Markdown"
+    )
 
 async def my_tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     task_service = TaskService()
 
-    try:
-        tasks = await task_service.get_user_tasks(update.effective_user.id)
-
-        if not tasks:
-            await update.message.reply_text(
-                "📝 You don't have any tasks yet.\n\n"
-                "Use /newtask to create your first task!",
-                reply_markup=get_task_keyboard()
-            )
-            return
+    tasks = await task_service.get_user_tasks(update.effective_user.id)
 
-        text = f"📋 *Your Tasks ({len(tasks)} total)*\n\n"
+    if not tasks:
+        await update.message.reply_text(
+            "📝 You don't have any tasks yet.\n\n"
+            "Use /newtask to create your first task!",
+            reply_markup=get_task_keyboard()
+        )
+        return
 
-        pending_tasks = [t for t in tasks if t.status in [TaskStatus.TODO, TaskStatus.IN_PROGRESS]]
-        completed_tasks = [t for t in tasks if t.status == TaskStatus.COMPLETED]
+    text = f"📋 *Your Tasks ({len(tasks)} total)*\n\n"
 
-        if pending_tasks:
-            text += "🔄 *Active Tasks:*\n"
-            for task in pending_tasks[:5]:
-                text += f"• {task.title} ({task.status.value.replace('_', ' ').title()})\n"
+    # Single pass: count both groups and render the first few pending tasks
+    pending_count = completed_count = 0
+    pending_lines = []
+    for task in tasks:
+        if task.status is TaskStatus.COMPLETED:
+            completed_count += 1
+        elif task.status in _PENDING_STATUSES:
+            pending_count += 1
+            if len(pending_lines) < _MAX_PENDING_SHOWN:
+                pending_lines.append(f"• {task.title} ({task.status.value.replace('_', ' ').title()})\n")
 
-            if len(pending_tasks) > 5:
-                text += f"... and {len(pending_tasks) - 5} more\n"
+    if pending_count:
+        text += "🔄 *Active Tasks:*\n"
+        text += "".join(pending_lines)
 
-        if completed_tasks:
-            text += f"\n✅ *Completed:* {len(completed_tasks)} tasks\n"
+        if pending_count > _MAX_PENDING_SHOWN:
+            text += f"... and {pending_count - _MAX_PENDING_SHOWN} more\n"
 
-        text += "\nUse the buttons below to manage your tasks."
+    if completed_count:
+        text += f"\n✅ *Completed:* {completed_count} tasks\n"
 
-        await update.message.reply_text(
-            text,
-            parse_mode="Markdown",
-            reply_markup=get_task_keyboard()
-        )
+    text += "\nUse the buttons below to manage your tasks."
 
-    except Exception as e:
-        await update.message.reply_text(
-            f"❌ Error fetching tasks: {str(e)}"
-        )
\ No newline at end of file
+    await update.message.reply_text(
+        text,
+        parse_mode="Markdown",
+        reply_markup=get_task_keyboard()
+    )
\ No newline at end of file
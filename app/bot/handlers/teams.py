@@ -24,34 +24,24 @@ async def create_team_command(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     team_text = " ".join(context.args)
 
-    if " | " in team_text:
-        name, description = team_text.split(" | ", 1)
-    else:
-        name = team_text
-        description = ""
+    name, _, description = team_text.partition(" | ")
 
     team_service = TeamService()
 
-    try:
-        team = await team_service.create_team(
-            name=name.strip(),
-            description=description.strip(),
-            admin_id=update.effective_user.id
-        )
-
-        await update.message.reply_text(
-            f"✅ *Team Created Successfully!*\n\n"
-            f"*Name:* {team.name}\n"
-            f"*Description:* {team.description or 'No description'}\n"
-            f"*Team ID:* `{team.id}`\n\n"
-            f"Share the Team ID with others so they can join using `/jointeam {team.id}`",
-            parse_mode="Markdown"
-        )
+    team = await team_service.create_team(
+        name=name.strip(),
+        description=description.strip(),
+        admin_id=update.effective_user.id
+    )
 
-    except Exception as e:
-        await update.message.reply_text(
-            f"❌ Error creating team: {str(e)}"
-        )
+    await update.message.reply_text(
+        f"✅ *Team Created Successfully!*\n\n"
+        f"*Name:* {team.name}\n"
+        f"*Description:* {team.description or 'No description'}\n"
+        f"*Team ID:* `{team.id}`\n\n"
+        f"Share the Team ID with others so they can join using `/jointeam {team.id}`",
+        parse_mode="Markdown"
+    )
 
 async def join_team_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args:
@@ -74,26 +64,20 @@ async def join_team_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     team_service = TeamService()
 
-    try:
-        team = await team_service.add_team_member(
-            team_id=team_id,
-            user_id=update.effective_user.id
-        )
-
-        if team:
-            await update.message.reply_text(
-                f"✅ *Successfully joined team!*\n\n"
-                f"*Team:* {team.name}\n"
-                f"*Description:* {team.description or 'No description'}\n\n"
-                f"You can now collaborate with your team members!",
-                parse_mode="Markdown"
-            )
-        else:
-            await update.message.reply_text(
-                "❌ Team not found or you're already a member."
-            )
+    team = await team_service.add_team_member(
+        team_id=team_id,
+        user_id=update.effective_user.id
+    )
 
-    except Exception as e:
+    if team:
+        await update.message.reply_text(
+            f"✅ *Successfully joined team!*\n\n"
+            f"*Team:* {team.name}\n"
+            f"*Description:* {team.description or 'No description'}\n\n"
+            f"You can now collaborate with your team members!",
+            parse_mode="Markdown"
+        )
+    else:
         await update.message.reply_text(
-            f"❌ Error joining team: {str(e)}"
+            "❌ Team not found or you're already a member."
         )
\ No newline at end of file
@@ -1,88 +1,99 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 
-def get_main_keyboard():
-    keyboard = [
+# Keyboards are static, so build them once at import and hand out the same markup
+_MAIN_KEYBOARD = ReplyKeyboardMarkup(
+    [
         [KeyboardButton("🕌 Prayer Times"), KeyboardButton("✅ My Tasks")],
         [KeyboardButton("👥 Teams"), KeyboardButton("⚙️ Settings")],
         [KeyboardButton("📍 Set Location"), KeyboardButton("❓ Help")]
+    ],
+    resize_keyboard=True
+)
+
+_PRAYER_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("Today", callback_data="prayer_today"),
+        InlineKeyboardButton("Tomorrow", callback_data="prayer_tomorrow")
+    ],
+    [
+        InlineKeyboardButton("Current Week", callback_data="prayer_week"),
+        InlineKeyboardButton("Set Location", callback_data="set_location")
+    ],
+    [InlineKeyboardButton("🔔 Notifications", callback_data="prayer_notifications")]
+])
+
+_TASK_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📝 New Task", callback_data="new_task"),
+        InlineKeyboardButton("📋 My Tasks", callback_data="my_tasks")
+    ],
+    [
+        InlineKeyboardButton("👥 Team Tasks", callback_data="team_tasks"),
+        InlineKeyboardButton("✅ Completed", callback_data="completed_tasks")
     ]
-    return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
+])
 
-def get_prayer_keyboard():
-    keyboard = [
-        [
-            InlineKeyboardButton("Today", callback_data="prayer_today"),
-            InlineKeyboardButton("Tomorrow", callback_data="prayer_tomorrow")
-        ],
-        [
-            InlineKeyboardButton("Current Week", callback_data="prayer_week"),
-            InlineKeyboardButton("Set Location", callback_data="set_location")
-        ],
-        [InlineKeyboardButton("🔔 Notifications", callback_data="prayer_notifications")]
+_TEAM_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("➕ Create Team", callback_data="create_team"),
+        InlineKeyboardButton("🔗 Join Team", callback_data="join_team")
+    ],
+    [
+        InlineKeyboardButton("👥 My Teams", callback_data="my_teams"),
+        InlineKeyboardButton("👑 Admin Panel", callback_data="admin_panel")
     ]
-    return InlineKeyboardMarkup(keyboard)
+])
 
-def get_task_keyboard():
-    keyboard = [
-        [
-            InlineKeyboardButton("📝 New Task", callback_data="new_task"),
-            InlineKeyboardButton("📋 My Tasks", callback_data="my_tasks")
-        ],
-        [
-            InlineKeyboardButton("👥 Team Tasks", callback_data="team_tasks"),
-            InlineKeyboardButton("✅ Completed", callback_data="completed_tasks")
-        ]
+_SETTINGS_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📍 Location", callback_data="settings_location"),
+        InlineKeyboardButton("🔔 Notifications", callback_data="settings_notifications")
+    ],
+    [
+        InlineKeyboardButton("🌍 Language", callback_data="settings_language"),
+        InlineKeyboardButton("⏰ Timezone", callback_data="settings_timezone")
     ]
-    return InlineKeyboardMarkup(keyboard)
+])
 
-def get_team_keyboard():
-    keyboard = [
-        [
-            InlineKeyboardButton("➕ Create Team", callback_data="create_team"),
-            InlineKeyboardButton("🔗 Join Team", callback_data="join_team")
-        ],
-        [
-            InlineKeyboardButton("👥 My Teams", callback_data="my_teams"),
-            InlineKeyboardButton("👑 Admin Panel", callback_data="admin_panel")
-        ]
+_TASK_STATUS_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("📝 To Do", callback_data="status_todo"),
+        InlineKeyboardButton("🔄 In Progress", callback_data="status_progress")
+    ],
+    [
+        InlineKeyboardButton("✅ Completed", callback_data="status_completed"),
+        InlineKeyboardButton("❌ Cancelled", callback_data="status_cancelled")
     ]
-    return InlineKeyboardMarkup(keyboard)
+])
 
-def get_settings_keyboard():
-    keyboard = [
-        [
-            InlineKeyboardButton("📍 Location", callback_data="settings_location"),
-            InlineKeyboardButton("🔔 Notifications", callback_data="settings_notifications")
-        ],
-        [
-            InlineKeyboardButton("🌍 Language", callback_data="settings_language"),
-            InlineKeyboardButton("⏰ Timezone", callback_data="settings_timezone")
-        ]
+_TASK_PRIORITY_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🟢 Low", callback_data="priority_low"),
+        InlineKeyboardButton("🟡 Medium", callback_data="priority_medium")
+    ],
+    [
+        InlineKeyboardButton("🟠 High", callback_data="priority_high"),
+        InlineKeyboardButton("🔴 Urgent", callback_data="priority_urgent")
     ]
-    return InlineKeyboardMarkup(keyboard)
+])
+
+def get_main_keyboard():
+    return _MAIN_KEYBOARD
+
+def get_prayer_keyboard():
+    return _PRAYER_KEYBOARD
+
+def get_task_keyboard():
+    return _TASK_KEYBOARD
+
+def get_team_keyboard():
+    return _TEAM_KEYBOARD
+
+def get_settings_keyboard():
+    return _SETTINGS_KEYBOARD
 
 def get_task_status_keyboard():
-    keyboard = [
-        [
-            InlineKeyboardButton("📝 To Do", callback_data="status_todo"),
-            InlineKeyboardButton("🔄 In Progress", callback_data="status_progress")
-        ],
-        [
-            InlineKeyboardButton("✅ Completed", callback_data="status_completed"),
-            InlineKeyboardButton("❌ Cancelled", callback_data="status_cancelled")
-        ]
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return _TASK_STATUS_KEYBOARD
 
 def get_task_priority_keyboard():
-    keyboard = [
-        [
-            InlineKeyboardButton("🟢 Low", callback_data="priority_low"),
-            InlineKeyboardButton("🟡 Medium", callback_data="priority_medium")
-        ],
-        [
-            InlineKeyboardButton("🟠 High", callback_data="priority_high"),
-            InlineKeyboardButton("🔴 Urgent", callback_data="priority_urgent")
-        ]
-    ]
-    return InlineKeyboardMarkup(keyboard)
\ No newline at end of file
+    return _TASK_PRIORITY_KEYBOARD
@@ -12,9 +12,20 @@ class Settings(BaseSettings):
     # Bot configuration
     BOT_TOKEN: str = Field(..., description="Telegram Bot Token")
     WEBHOOK_URL: Optional[str] = Field(None, description="Webhook URL for production")
+    WEBHOOK_SECRET: Optional[str] = Field(None, description="Secret token Telegram sends with webhook updates")
 
     # Database configuration
     DATABASE_URL: str = Field("sqlite+aiosqlite:///./bot.db", description="Database URL")
+    DB_POOL_SIZE: int = Field(25, description="Persistent connections kept in the pool")
+    DB_MAX_OVERFLOW: int = Field(25, description="Extra connections allowed above the pool size")
+    DB_POOL_RECYCLE: int = Field(1800, description="Seconds before a pooled connection is replaced")
+    DB_POOL_TIMEOUT: float = Field(10.0, description="Seconds to wait for a free pooled connection before failing")
+    DB_SLOW_QUERY_MS: int = Field(200, description="Statements slower than this are logged as warnings")
+
+    # Telegram HTTP client configuration
+    CONNECTION_POOL_SIZE: int = Field(32, description="Connection pool size for outbound Bot API calls")
+    UPDATES_POOL_SIZE: int = Field(4, description="Connection pool size for getUpdates long polling")
+    POOL_TIMEOUT: float = Field(10.0, description="Seconds to wait for a free pooled connection")
 
     # API configuration
     PRAYER_API_URL: str = Field("https://islomapi.uz/api/present/day", description="Prayer times API")
@@ -1,26 +1,70 @@
 """Database configuration and models"""
 
 import asyncio
+import logging
+import time
 from datetime import datetime
-from typing import AsyncGenerator, List, Optional
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, ForeignKey, JSON
+from sqlalchemy import BigInteger, Boolean, Column, Date, DateTime, Integer, String, Text, ForeignKey, Index, JSON
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, selectinload
-from sqlalchemy import select, func
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.orm import relationship
+from sqlalchemy import and_, event, inspect, select, func, text, update
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
-# Create async engine
+# Create async engine; aiosqlite would otherwise default to NullPool and
+# open a fresh connection for every session
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
-    future=True
+    future=True,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    # Fail fast under a burst instead of piling up coroutines waiting on a connection
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=True
 )
 
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers proceed while a write is in progress"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
+
+
+# Read once; the listener below runs for every statement
+SLOW_QUERY_MS = settings.DB_SLOW_QUERY_MS
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _log_slow_query(conn, cursor, statement, parameters, context, executemany):
+    """Surface statements that hold a connection for too long"""
+    elapsed_ms = (time.perf_counter() - context._query_started_at) * 1000
+    if elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning("Slow query (%.0f ms): %s", elapsed_ms, statement)
+
+
 # Create session factory
 async_session_factory = async_sessionmaker(
     engine,
@@ -33,7 +77,7 @@ class User(Base):
     """User model"""
     __tablename__ = "users"
 
-    id = Column(String, primary_key=True)  # Telegram user ID
+    id = Column(BigInteger, primary_key=True, autoincrement=False)  # Telegram user ID
     first_name = Column(String)
     last_name = Column(String, nullable=True)
     username = Column(String, nullable=True)
@@ -47,7 +91,7 @@ class User(Base):
     registration_date = Column(DateTime, default=datetime.utcnow)
     last_activity = Column(DateTime, default=datetime.utcnow)
     total_tasks_created = Column(Integer, default=0)
-    blocked_bot = Column(Boolean, default=False)
+    blocked_bot = Column(Boolean, default=False, index=True)
     blocked_at = Column(DateTime, nullable=True)
 
     # Relationships
@@ -64,7 +108,7 @@ class Task(Base):
     __tablename__ = "tasks"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
 
     # Task details
     name = Column(String, nullable=False)
@@ -80,8 +124,8 @@ class Task(Base):
 
     # Team assignment
     team_id = Column(String, ForeignKey("teams.id"), nullable=True)
-    assigned_by = Column(String, ForeignKey("users.id"), nullable=True)
-    completed_by = Column(String, ForeignKey("users.id"), nullable=True)
+    assigned_by = Column(BigInteger, ForeignKey("users.id"), nullable=True)
+    completed_by = Column(BigInteger, ForeignKey("users.id"), nullable=True)
 
     # Notifications tracking
     notification_1day_sent = Column(Boolean, default=False)
@@ -93,6 +137,14 @@ class Task(Base):
     user = relationship("User", back_populates="tasks", foreign_keys=[user_id])
     team = relationship("Team", back_populates="tasks")
 
+    __table_args__ = (
+        Index("ix_tasks_user_completed_due", "user_id", "completed", "due_date"),
+        Index("ix_tasks_completed_due", "completed", "due_date"),
+        # Team views filter a team's tasks by completion and by due date
+        Index("ix_task_team_completed", "team_id", "completed"),
+        Index("ix_task_team_due", "team_id", "due_date"),
+    )
+
 
 class Team(Base):
     """Team model"""
@@ -100,7 +152,7 @@ class Team(Base):
 
     id = Column(String, primary_key=True)  # 6-character code
     name = Column(String, nullable=False)
-    admin_id = Column(String, ForeignKey("users.id"), nullable=False)
+    admin_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -108,6 +160,11 @@ class Team(Base):
     allow_member_invite = Column(Boolean, default=False)
     require_approval = Column(Boolean, default=True)
 
+    # Denormalized counters, kept in step by every write that changes them so stats are a row read
+    total_members = Column(Integer, default=0, server_default="0", nullable=False)
+    total_tasks = Column(Integer, default=0, server_default="0", nullable=False)
+    completed_tasks = Column(Integer, default=0, server_default="0", nullable=False)
+
     # Relationships
     members = relationship("TeamMember", back_populates="team", cascade="all, delete-orphan")
     tasks = relationship("Task", back_populates="team")
@@ -120,7 +177,7 @@ class TeamMember(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     team_id = Column(String, ForeignKey("teams.id"), nullable=False)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
 
     joined_at = Column(DateTime, default=datetime.utcnow)
     is_admin = Column(Boolean, default=False)
@@ -129,14 +186,21 @@ class TeamMember(Base):
     team = relationship("Team", back_populates="members")
     user = relationship("User", back_populates="team_memberships")
 
+    __table_args__ = (
+        # Membership checks and per-team member lists; also rules out joining twice
+        Index("ix_tm_team_user", "team_id", "user_id", unique=True),
+        # A user's own team list
+        Index("ix_tm_user", "user_id"),
+    )
+
 
 class PrayerNotification(Base):
     """Prayer notification tracking"""
     __tablename__ = "prayer_notifications"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    date = Column(String, nullable=False)  # YYYY-MM-DD format
+    user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
+    date = Column(Date, nullable=False)
     prayer_name = Column(String, nullable=False)  # Fajr, Dhuhr, Asr, Maghrib, Isha
     notification_type = Column(String, nullable=False)  # 15min, 5min
     sent_at = Column(DateTime, default=datetime.utcnow)
@@ -144,6 +208,15 @@ class PrayerNotification(Base):
     # Relationships
     user = relationship("User")
 
+    __table_args__ = (
+        # Covers the per-day sent lookup and stops a reminder being recorded twice
+        Index(
+            "ix_prayer_notif_lookup",
+            "date", "user_id", "prayer_name", "notification_type",
+            unique=True
+        ),
+    )
+
 
 # Database functions
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
@@ -159,6 +232,115 @@ async def init_db():
     """Initialize database"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        added_columns = await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_migrate_integer_id_columns)
+        if added_columns & {"teams.total_members", "teams.total_tasks", "teams.completed_tasks"}:
+            await conn.execute(recount_team_counters())
+        await conn.run_sync(_create_missing_indexes)
+
+    await warm_up_pool()
+
+
+def _add_missing_columns(sync_conn) -> set:
+    """create_all doesn't alter existing tables either, add new columns and return their names"""
+    inspector = inspect(sync_conn)
+    added = set()
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(sync_conn.dialect)}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+            sync_conn.execute(text(ddl))
+            added.add(f"{table.name}.{column.name}")
+
+    return added
+
+
+def _migrate_integer_id_columns(sync_conn):
+    """Rebuild tables whose Telegram ID columns are still VARCHAR from before the BigInteger switch"""
+    # Those IDs come back as str and never compare equal to Telegram's ints in Python.
+    # SQLite can't change a column type in place, so recreate the table and CAST the IDs
+    # across; indexes go with the old table and are recreated by _create_missing_indexes.
+    if sync_conn.dialect.name != "sqlite":
+        return
+
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        if not any(
+            isinstance(column.type, BigInteger) and isinstance(existing.get(column.name), String)
+            for column in table.columns
+        ):
+            continue
+
+        logger.info("Migrating %s ID columns to INTEGER", table.name)
+        new_name = f"{table.name}_new"
+        ddl = str(CreateTable(table).compile(sync_conn)).strip()
+        sync_conn.execute(text(ddl.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {new_name} ", 1)))
+
+        columns = [column.name for column in table.columns]
+        values = [
+            f"CAST(NULLIF({column.name}, '') AS INTEGER)" if isinstance(column.type, BigInteger) else column.name
+            for column in table.columns
+        ]
+        sync_conn.execute(text(
+            f"INSERT INTO {new_name} ({', '.join(columns)}) SELECT {', '.join(values)} FROM {table.name}"
+        ))
+        sync_conn.execute(text(f"DROP TABLE {table.name}"))
+        sync_conn.execute(text(f"ALTER TABLE {new_name} RENAME TO {table.name}"))
+
+
+def recount_team_counters():
+    """UPDATE resetting every team's counters from the member and task tables"""
+    return update(Team).values(
+        total_members=select(func.count(TeamMember.id))
+        .where(TeamMember.team_id == Team.id)
+        .scalar_subquery(),
+        total_tasks=select(func.count(Task.id))
+        .where(Task.team_id == Team.id)
+        .scalar_subquery(),
+        completed_tasks=select(func.count(Task.id))
+        .where(and_(Task.team_id == Team.id, Task.completed == True))
+        .scalar_subquery()
+    )
+
+
+# Unique indexes added after release: (table, index, key columns) to deduplicate on first creation
+UNIQUE_INDEX_KEYS = [
+    ("prayer_notifications", "ix_prayer_notif_lookup", "date, user_id, prayer_name, notification_type"),
+    ("team_members", "ix_tm_team_user", "team_id, user_id"),
+]
+
+
+def _create_missing_indexes(sync_conn):
+    """create_all skips indexes on tables that already exist, add them here"""
+    inspector = inspect(sync_conn)
+    for table_name, index_name, columns in UNIQUE_INDEX_KEYS:
+        existing = {index["name"] for index in inspector.get_indexes(table_name)}
+        if index_name not in existing:
+            # Older databases may hold duplicate rows, which would block the unique index
+            sync_conn.execute(text(
+                f"DELETE FROM {table_name} WHERE id NOT IN ("
+                f"SELECT MIN(id) FROM {table_name} GROUP BY {columns})"
+            ))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
+async def warm_up_pool():
+    """Open pool_size connections up front so the first requests don't pay for connecting"""
+    connections = await asyncio.gather(
+        *(engine.connect().start() for _ in range(settings.DB_POOL_SIZE))
+    )
+    await asyncio.gather(*(conn.close() for conn in connections))
 
 
 async def close_db():
@@ -166,25 +348,51 @@ async def close_db():
     await engine.dispose()
 
 
-async def get_user(user_id: str) -> Optional[User]:
+async def get_user(user_id: int) -> Optional[User]:
     """Get user by ID"""
+    async with async_session_factory() as session:
+        return await session.get(User, user_id)
+
+
+async def get_user_with_task_counts(user_id: int) -> Optional[Tuple[User, int, int]]:
+    """Get user with (completed, total) task counts in one query"""
     async with async_session_factory() as session:
         result = await session.execute(
-            select(User).where(User.id == user_id)
+            select(
+                User,
+                func.count(Task.id).filter(Task.completed.is_(True)),
+                func.count(Task.id)
+            )
+            .outerjoin(Task, Task.user_id == User.id)
+            .where(User.id == user_id)
+            .group_by(User.id)
         )
-        return result.scalar_one_or_none()
+        row = result.one_or_none()
+        return tuple(row) if row else None
 
 
+# user_id -> in-flight get_or_create_user lookup, shared by concurrent callers
+_pending_user_loads: Dict[int, "asyncio.Task[User]"] = {}
 
 
-async def get_or_create_user(user_id: str, first_name: str, last_name: str = None, username: str = None) -> User:
+async def get_or_create_user(user_id: int, first_name: str, last_name: str = None, username: str = None) -> User:
     """Get existing user or create new one"""
+    # A burst of updates from one user (e.g. right after a restart) runs a single lookup
+    pending = _pending_user_loads.get(user_id)
+    if pending is None:
+        pending = asyncio.create_task(_get_or_create_user(user_id, first_name, last_name, username))
+        _pending_user_loads[user_id] = pending
+        pending.add_done_callback(lambda _: _pending_user_loads.pop(user_id, None))
+
+    # Shielded so one caller being cancelled doesn't cancel the lookup for the others
+    return await asyncio.shield(pending)
+
+
+async def _get_or_create_user(user_id: int, first_name: str, last_name: str = None, username: str = None) -> User:
+    """Load the user, creating or refreshing their row"""
     async with async_session_factory() as session:
         # Try to get existing user
-        result = await session.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = result.scalar_one_or_none()
+        user = await session.get(User, user_id)
 
         if not user:
             # Create new user
@@ -202,28 +410,25 @@ async def get_or_create_user(user_id: str, first_name: str, last_name: str = Non
             user.username = username
             user.last_activity = datetime.utcnow()
 
+        # expire_on_commit=False keeps the written values, no refresh needed
         await session.commit()
-        await session.refresh(user)
         return user
 
 
 async def get_stats():
     """Get bot statistics"""
     async with async_session_factory() as session:
-        # Count users
-        total_users = await session.scalar(select(func.count(User.id)))
-        active_users = await session.scalar(
-            select(func.count(User.id)).where(User.blocked_bot == False)
-        )
-
-        # Count tasks
-        total_tasks = await session.scalar(select(func.count(Task.id)))
-        completed_tasks = await session.scalar(
-            select(func.count(Task.id)).where(Task.completed == True)
-        )
-
-        # Count teams
-        total_teams = await session.scalar(select(func.count(Team.id)))
+        # Single round trip: each count is a scalar subquery
+        row = (await session.execute(
+            select(
+                select(func.count(User.id)).scalar_subquery(),
+                select(func.count(User.id)).where(User.blocked_bot == False).scalar_subquery(),
+                select(func.count(Task.id)).scalar_subquery(),
+                select(func.count(Task.id)).where(Task.completed == True).scalar_subquery(),
+                select(func.count(Team.id)).scalar_subquery()
+            )
+        )).one()
+        total_users, active_users, total_tasks, completed_tasks, total_teams = row
 
         return {
             "users": {
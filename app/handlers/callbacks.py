@@ -1,27 +1,122 @@
 """Callback query handlers for inline keyboards"""
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func, update
 
-from app.database import async_session_factory, User, Task, Team
+from app.database import async_session_factory, get_user_with_task_counts, User, Task, Team
 from app.utils.keyboards import KeyboardBuilder
-from app.utils.formatters import ModernUI
+from app.utils.formatters import ModernUI, create_header, create_section
+from app.utils.callback_data import TaskCB, RegionCB
+from app.utils.background import run_in_background
+from app.services.prayer_service import PrayerService
 from app.services.team_service import TeamService
+from app.services.notification_service import request_task_rescan
 
 logger = logging.getLogger(__name__)
 
 callbacks_router = Router()
 keyboard_builder = KeyboardBuilder()
+prayer_service = PrayerService()
 team_service = TeamService()
 
+# Static menus, built once and shared by every request
+MAIN_MENU = keyboard_builder.main_menu()
+PROFILE_MENU = keyboard_builder.profile_menu()
+PRAYER_MENU = keyboard_builder.prayer_menu()
+EMPTY_TASKS_MENU = keyboard_builder.empty_tasks_menu()
+TEAM_CREATION_MENU = keyboard_builder.team_creation_menu()
+
+
+def _build_region_keyboard(regions) -> InlineKeyboardMarkup:
+    """Region selection keyboard, two regions per row"""
+    keyboard_rows = [
+        [InlineKeyboardButton(text=region, callback_data=RegionCB(region=region).pack()) for region in regions[i:i + 2]]
+        for i in range(0, len(regions), 2)
+    ]
+    keyboard_rows.append([InlineKeyboardButton(text="⬅️ Orqaga", callback_data="show_prayer_times")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard_rows)
+
+
+def _build_notification_settings_keyboard(prayer_enabled: bool, general_enabled: bool) -> InlineKeyboardMarkup:
+    """Notification toggles keyboard for the given on/off state"""
+    toggle_prayer = "🔕 O'chirish" if prayer_enabled else "🔔 Yoqish"
+    toggle_general = "🔕 O'chirish" if general_enabled else "🔔 Yoqish"
+
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text=f"🕌 {toggle_prayer}", callback_data="toggle_prayer_notifications"),
+            InlineKeyboardButton(text=f"📝 {toggle_general}", callback_data="toggle_general_notifications")
+        ],
+        [
+            InlineKeyboardButton(text="⬅️ Orqaga", callback_data="show_prayer_times")
+        ]
+    ])
+
+
+PRIORITY_EMOJI = {"high": "🔴", "medium": "🟡", "low": "🟢"}
+TASK_DUE_FORMAT = "%d.%m %H:%M"
+MAX_ACTIVE_TASKS_SHOWN = 5
+
+# Static texts, rendered once at import
+HELP_TEXT = (
+    create_header("❓ YORDAM VA QO'LLANMA")
+    + "\n" + create_section(
+        "📝 ASOSIY BUYRUQLAR",
+        "/start - Botni ishga tushirish\n"
+        "/tasks - Barcha vazifalar\n"
+        "/add - Yangi vazifa qo'shish\n"
+        "/profile - Profil va statistika\n"
+        "/help - Bu yordam xabari\n"
+    )
+    + create_section(
+        "🔧 FUNKSIYALAR",
+        "🎯 ➕ **Vazifalar yaratish va boshqarish**\n"
+        "⏰ 🔔 **Vaqt va eslatmalar**\n"
+        "🏆 📁 **Prioritet va kategoriyalar**\n"
+        "👥 🤝 **Jamoa bilan ishlash**\n"
+        "🕌 📿 **Namaz vaqtlari va bildirishnomalar**\n"
+        "📊 📈 **Tahlil va hisobotlar**\n"
+    )
+)
+
+START_MENU_TEXT = (
+    create_header("🌟 ASOSIY MENYU")
+    + "\n" + create_section(
+        "🚀 IMKONIYATLAR",
+        "🕌 **Namaz vaqtlari** - Aniq vaqtlar va eslatmalar\n"
+        "📝 **Vazifalar** - Shaxsiy va jamoaviy vazifalar\n"
+        "👥 **Jamoalar** - Hamkorlik va taqsimlash\n"
+        "📊 **Statistika** - Tahlil va hisobotlar\n"
+    )
+)
+
+REGION_SELECTION_TEXT = (
+    create_header("📍 HUDUDNI TANLANG")
+    + "\n" + create_section(
+        "🌍 O'ZBEKISTON HUDUDLARI",
+        "Namaz vaqtlarini aniq olish uchun\n"
+        "hududingizni tanlang:"
+    )
+)
+
+# Static keyboards, built once at import
+REGION_KEYBOARD = _build_region_keyboard(prayer_service.get_regions())
+NOTIFICATION_SETTINGS_KEYBOARDS = {
+    (prayer_enabled, general_enabled): _build_notification_settings_keyboard(prayer_enabled, general_enabled)
+    for prayer_enabled in (True, False)
+    for general_enabled in (True, False)
+}
+
 
 @callbacks_router.callback_query(F.data == "back_to_main_tasks")
 async def callback_main_tasks(callback: CallbackQuery):
     """Show main tasks view"""
-    user_id = str(callback.from_user.id)
+    user_id = callback.from_user.id
     await show_tasks(callback.message, user_id)
     await callback.answer()
 
@@ -29,7 +124,7 @@ async def callback_main_tasks(callback: CallbackQuery):
 @callbacks_router.callback_query(F.data == "add_task")
 async def callback_add_task(callback: CallbackQuery):
     """Start task creation process"""
-    user_id = str(callback.from_user.id)
+    user_id = callback.from_user.id
     logger.info(f"User {user_id} adding new task")
 
     text = (
@@ -45,36 +140,24 @@ async def callback_add_task(callback: CallbackQuery):
 @callbacks_router.callback_query(F.data == "view_profile")
 async def callback_view_profile(callback: CallbackQuery):
     """Show user profile"""
-    user_id = str(callback.from_user.id)
+    user_id = callback.from_user.id
 
-    async with async_session_factory() as session:
-        # Get user
-        user_result = await session.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = user_result.scalar_one_or_none()
+    profile = await get_user_with_task_counts(user_id)
 
-        if not user:
-            await callback.answer("❌ Foydalanuvchi topilmadi.")
-            return
+    if not profile:
+        await callback.answer("❌ Foydalanuvchi topilmadi.")
+        return
 
-        # Get user tasks for statistics
-        tasks_result = await session.execute(
-            select(Task).where(Task.user_id == user_id)
-        )
-        tasks = tasks_result.scalars().all()
-
-        total = len(tasks)
-        completed = len([t for t in tasks if t.completed])
-        active = total - completed
+    user, completed, total = profile
+    active = total - completed
 
     progress_bar = ModernUI.create_progress_bar(completed, total)
 
-    profile_text = ModernUI.create_header(
+    profile_text = create_header(
         f"👤 {user.first_name or 'User'}",
         "*Shaxsiy profil*"
     )
-    profile_text += "\n" + ModernUI.create_section(
+    profile_text += "\n" + create_section(
         "📊 STATISTIKA",
         f"📝 **Jami:** {total} ta vazifa\n"
         f"✅ **Bajarilgan:** {completed} ta\n"
@@ -82,7 +165,7 @@ async def callback_view_profile(callback: CallbackQuery):
         f"📈 **Bajarish darajasi:** {progress_bar}\n"
     )
 
-    keyboard = keyboard_builder.profile_menu()
+    keyboard = PROFILE_MENU
 
     await callback.message.edit_text(profile_text, reply_markup=keyboard, parse_mode="Markdown")
     await callback.answer()
@@ -91,53 +174,23 @@ async def callback_view_profile(callback: CallbackQuery):
 @callbacks_router.callback_query(F.data == "show_help")
 async def callback_show_help(callback: CallbackQuery):
     """Show help message"""
-    help_text = ModernUI.create_header("❓ YORDAM VA QO'LLANMA")
-    help_text += "\n" + ModernUI.create_section(
-        "📝 ASOSIY BUYRUQLAR",
-        "/start - Botni ishga tushirish\n"
-        "/tasks - Barcha vazifalar\n"
-        "/add - Yangi vazifa qo'shish\n"
-        "/profile - Profil va statistika\n"
-        "/help - Bu yordam xabari\n"
-    )
-    help_text += ModernUI.create_section(
-        "🔧 FUNKSIYALAR",
-        "🎯 ➕ **Vazifalar yaratish va boshqarish**\n"
-        "⏰ 🔔 **Vaqt va eslatmalar**\n"
-        "🏆 📁 **Prioritet va kategoriyalar**\n"
-        "👥 🤝 **Jamoa bilan ishlash**\n"
-        "🕌 📿 **Namaz vaqtlari va bildirishnomalar**\n"
-        "📊 📈 **Tahlil va hisobotlar**\n"
-    )
-
-    await callback.message.edit_text(help_text, parse_mode="Markdown")
+    await callback.message.edit_text(HELP_TEXT, parse_mode="Markdown")
     await callback.answer()
 
 
 @callbacks_router.callback_query(F.data == "show_prayer_times")
-async def callback_show_prayer_times(callback: CallbackQuery):
+async def callback_show_prayer_times(callback: CallbackQuery, user: Optional[User] = None):
     """Show prayer times"""
-    user_id = str(callback.from_user.id)
-
-    async with async_session_factory() as session:
-        user_result = await session.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = user_result.scalar_one_or_none()
-
-        if not user:
-            await callback.answer("❌ Foydalanuvchi topilmadi.")
-            return
-
-    from app.services.prayer_service import PrayerService
-    prayer_service = PrayerService()
+    if not user:
+        await callback.answer("❌ Foydalanuvchi topilmadi.")
+        return
 
     try:
         region = user.prayer_region or "Toshkent"
         prayer_times = await prayer_service.get_prayer_times(region)
         formatted_times = prayer_service.format_for_display(prayer_times, region)
 
-        keyboard = keyboard_builder.prayer_menu()
+        keyboard = PRAYER_MENU
 
         await callback.message.edit_text(formatted_times, reply_markup=keyboard, parse_mode="Markdown")
 
@@ -151,12 +204,12 @@ async def callback_show_prayer_times(callback: CallbackQuery):
 @callbacks_router.callback_query(F.data == "show_team_features")
 async def callback_show_team_features(callback: CallbackQuery):
     """Show team features"""
-    user_id = str(callback.from_user.id)
+    user_id = callback.from_user.id
 
     user_teams = await team_service.get_user_teams(user_id)
 
     if not user_teams:
-        keyboard = keyboard_builder.team_creation_menu()
+        keyboard = TEAM_CREATION_MENU
 
         await callback.message.edit_text(
             "👥 **JAMOA IMKONIYATLARI**\n\n"
@@ -174,126 +227,158 @@ async def callback_show_team_features(callback: CallbackQuery):
             parse_mode="Markdown"
         )
     else:
-        keyboard = keyboard_builder.multiple_teams_menu(user_teams)
-
-        message_text = f"👥 **SIZNING JAMOALARINGIZ ({len(user_teams)})**\n\n"
-        for i, team in enumerate(user_teams, 1):
-            stats = await team_service.get_team_stats(team.id)
-            role = "👑" if team.admin_id == user_id else "👤"
-            message_text += f"{i}. {role} **{team.name}**\n"
-            message_text += f"   🆔 `{team.id}` | 👥 {stats['total_members']} a'zo\n\n"
-
+        message_text, keyboard = await team_service.render_team_list(user_teams)
         await callback.message.edit_text(message_text, reply_markup=keyboard, parse_mode="Markdown")
 
     await callback.answer()
 
 
-@callbacks_router.callback_query(F.data.startswith("complete_task_"))
-async def callback_complete_task(callback: CallbackQuery):
+@callbacks_router.callback_query(TaskCB.filter())
+async def callback_complete_task(callback: CallbackQuery, callback_data: TaskCB):
     """Complete a task"""
-    user_id = str(callback.from_user.id)
-    task_id = callback.data.split("_")[2]
+    user_id = callback.from_user.id
+    task_id = callback_data.task_id
 
     logger.info(f"User {user_id} completing task {task_id}")
 
     async with async_session_factory() as session:
-        # Get and update task
-        task_result = await session.execute(
-            select(Task).where(and_(Task.id == int(task_id), Task.user_id == user_id))
-        )
-        task = task_result.scalar_one_or_none()
-
-        if not task:
-            await callback.answer("❌ Vazifa topilmadi.")
+        # Mark as completed in one statement; only matches a still-open task
+        completed = (await session.execute(
+            update(Task)
+            .where(and_(Task.id == task_id, Task.user_id == user_id, Task.completed.is_(False)))
+            .values(completed=True, completed_at=datetime.utcnow())
+            .returning(Task.id, Task.team_id)
+        )).first()
+
+        if completed is None:
+            # Nothing updated: tell apart a missing task from an already completed one
+            already_completed = await session.scalar(
+                select(Task.completed).where(and_(Task.id == task_id, Task.user_id == user_id))
+            )
+            if already_completed is None:
+                await callback.answer("❌ Vazifa topilmadi.")
+            else:
+                await callback.answer("✅ Vazifa allaqachon bajarilgan.")
             return
 
-        if task.completed:
-            await callback.answer("✅ Vazifa allaqachon bajarilgan.")
-            return
+        if completed.team_id:
+            await session.execute(
+                update(Team)
+                .where(Team.id == completed.team_id)
+                .values(completed_tasks=Team.completed_tasks + 1)
+            )
 
-        # Mark as completed
-        task.completed = True
-        task.completed_at = datetime.utcnow()
         await session.commit()
 
     await callback.answer("✅ Vazifa bajarildi!")
 
-    # Refresh tasks view
-    await show_tasks(callback.message, user_id)
+    # Refresh tasks view off the request path, the callback is already answered
+    run_in_background(show_tasks(callback.message, user_id), "Tasks refresh")
 
 
-async def show_tasks(message: Message, user_id: str):
+# Buttons sent before TaskCB (e.g. on reminders already in users' chats) still carry
+# "complete_task_<id>"; keep answering them until those messages have aged out
+@callbacks_router.callback_query(F.data.startswith("complete_task_"))
+async def callback_complete_task_legacy(callback: CallbackQuery):
+    """Complete a task from an old-format button"""
+    task_id = callback.data.removeprefix("complete_task_")
+    if not task_id.isdigit():
+        await callback.answer("❌ Vazifa topilmadi.")
+        return
+
+    await callback_complete_task(callback, TaskCB(task_id=int(task_id)))
+
+
+async def show_tasks(message: Message, user_id: int):
     """Show user tasks"""
+    # Only the first few active rows are displayed; everything else is just counted
+    active_tasks, (active_count, completed_count) = await asyncio.gather(
+        _get_active_tasks(user_id, MAX_ACTIVE_TASKS_SHOWN),
+        _count_tasks(user_id)
+    )
+
+    await render_tasks(message, active_tasks, active_count, completed_count)
+
+
+async def _get_active_tasks(user_id: int, limit: int) -> List[Task]:
+    """Get the user's earliest due active tasks"""
     async with async_session_factory() as session:
-        # Get user tasks
         tasks_result = await session.execute(
-            select(Task).where(Task.user_id == user_id).order_by(Task.due_date)
+            select(Task)
+            .where(and_(Task.user_id == user_id, Task.completed.is_(False)))
+            .order_by(Task.due_date)
+            .limit(limit)
         )
-        tasks = tasks_result.scalars().all()
+        return tasks_result.scalars().all()
 
-        if not tasks:
-            text = (
-                "📋 **VAZIFALAR RO'YXATI**\n\n"
-                "📝 Hozircha vazifalar yo'q\n\n"
-                "➕ Yangi vazifa qo'shing va samarali ishlashni boshlang!"
-            )
-            keyboard = keyboard_builder.empty_tasks_menu()
-        else:
-            # Separate tasks by status
-            active_tasks = [t for t in tasks if not t.completed]
-            completed_tasks = [t for t in tasks if t.completed]
 
-            text = f"📋 **VAZIFALAR RO'YXATI**\n\n"
+async def _count_tasks(user_id: int) -> Tuple[int, int]:
+    """Get (active, completed) task counts for the user"""
+    async with async_session_factory() as session:
+        completed, total = (await session.execute(
+            select(
+                func.count().filter(Task.completed.is_(True)),
+                func.count()
+            ).where(Task.user_id == user_id)
+        )).one()
+        return total - completed, completed
+
+
+async def render_tasks(message: Message, active_tasks: List[Task], active_count: int, completed_count: int):
+    """Render the task overview from already loaded rows and counts"""
+    total = active_count + completed_count
+
+    if not total:
+        text = (
+            "📋 **VAZIFALAR RO'YXATI**\n\n"
+            "📝 Hozircha vazifalar yo'q\n\n"
+            "➕ Yangi vazifa qo'shing va samarali ishlashni boshlang!"
+        )
+        keyboard = EMPTY_TASKS_MENU
+    else:
+        text = f"📋 **VAZIFALAR RO'YXATI**\n\n"
 
-            if active_tasks:
-                text += "⏳ **FAOL VAZIFALAR:**\n"
-                for task in active_tasks[:5]:  # Show max 5 active tasks
-                    priority_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(task.priority, "⚪")
-                    due_date = task.due_date.strftime("%d.%m %H:%M")
-                    text += f"{priority_emoji} {task.name} - {due_date}\n"
+        if active_tasks:
+            text += "⏳ **FAOL VAZIFALAR:**\n"
+            text += "".join(
+                f"{PRIORITY_EMOJI.get(task.priority, '⚪')} {task.name} - {task.due_date.strftime(TASK_DUE_FORMAT)}\n"
+                for task in active_tasks[:MAX_ACTIVE_TASKS_SHOWN]
+            )
 
-                if len(active_tasks) > 5:
-                    text += f"... va yana {len(active_tasks) - 5} ta\n"
+            if active_count > MAX_ACTIVE_TASKS_SHOWN:
+                text += f"... va yana {active_count - MAX_ACTIVE_TASKS_SHOWN} ta\n"
 
-            if completed_tasks:
-                text += f"\n✅ **BAJARILGAN:** {len(completed_tasks)} ta\n"
+        if completed_count:
+            text += f"\n✅ **BAJARILGAN:** {completed_count} ta\n"
 
-            text += f"\n📊 **Jami:** {len(tasks)} ta vazifa"
+        text += f"\n📊 **Jami:** {total} ta vazifa"
 
-            keyboard = keyboard_builder.tasks_menu(active_tasks)
+        keyboard = keyboard_builder.tasks_menu(active_tasks)
 
-        try:
-            await message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
-        except:
-            await message.answer(text, reply_markup=keyboard, parse_mode="Markdown")
+    try:
+        await message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    except:
+        await message.answer(text, reply_markup=keyboard, parse_mode="Markdown")
 
 
 @callbacks_router.callback_query(F.data == "notification_settings")
-async def callback_notification_settings(callback: CallbackQuery):
+async def callback_notification_settings(callback: CallbackQuery, user: Optional[User] = None):
     """Show notification settings"""
-    user_id = str(callback.from_user.id)
-
-    async with async_session_factory() as session:
-        user_result = await session.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = user_result.scalar_one_or_none()
-
-        if not user:
-            await callback.answer("❌ Foydalanuvchi topilmadi.")
-            return
+    if not user:
+        await callback.answer("❌ Foydalanuvchi topilmadi.")
+        return
 
     # Create notification settings message
     prayer_status = "✅ Yoqilgan" if user.prayer_notifications_enabled else "❌ O'chirilgan"
     general_status = "✅ Yoqilgan" if user.notifications_enabled else "❌ O'chirilgan"
 
-    text = ModernUI.create_header("🔔 BILDIRISHNOMA SOZLAMALARI")
-    text += "\n" + ModernUI.create_section(
+    text = create_header("🔔 BILDIRISHNOMA SOZLAMALARI")
+    text += "\n" + create_section(
         "⚙️ JORIY SOZLAMALAR",
         f"🕌 **Namaz bildirishnomalari:** {prayer_status}\n"
         f"📝 **Vazifa bildirishnomalari:** {general_status}\n"
     )
-    text += ModernUI.create_section(
+    text += create_section(
         "📱 BILDIRISHNOMA TURLARI",
         "🕌 **Namaz vaqtlari:**\n"
         "• 15 daqiqa oldin\n"
@@ -305,19 +390,9 @@ async def callback_notification_settings(callback: CallbackQuery):
         "• Vaqti kelganda\n"
     )
 
-    # Create notification settings keyboard inline
-    toggle_prayer = "🔕 O'chirish" if user.prayer_notifications_enabled else "🔔 Yoqish"
-    toggle_general = "🔕 O'chirish" if user.notifications_enabled else "🔔 Yoqish"
-
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text=f"🕌 {toggle_prayer}", callback_data="toggle_prayer_notifications"),
-            InlineKeyboardButton(text=f"📝 {toggle_general}", callback_data="toggle_general_notifications")
-        ],
-        [
-            InlineKeyboardButton(text="⬅️ Orqaga", callback_data="show_prayer_times")
-        ]
-    ])
+    keyboard = NOTIFICATION_SETTINGS_KEYBOARDS[
+        (bool(user.prayer_notifications_enabled), bool(user.notifications_enabled))
+    ]
 
     await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
     await callback.answer()
@@ -326,131 +401,95 @@ async def callback_notification_settings(callback: CallbackQuery):
 @callbacks_router.callback_query(F.data == "start_fresh")
 async def callback_start_fresh(callback: CallbackQuery):
     """Return to main start menu"""
-    user_id = str(callback.from_user.id)
-
-    text = ModernUI.create_header("🌟 ASOSIY MENYU")
-    text += "\n" + ModernUI.create_section(
-        "🚀 IMKONIYATLAR",
-        "🕌 **Namaz vaqtlari** - Aniq vaqtlar va eslatmalar\n"
-        "📝 **Vazifalar** - Shaxsiy va jamoaviy vazifalar\n"
-        "👥 **Jamoalar** - Hamkorlik va taqsimlash\n"
-        "📊 **Statistika** - Tahlil va hisobotlar\n"
-    )
-
-    keyboard = keyboard_builder.main_menu()
-
-    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    await callback.message.edit_text(START_MENU_TEXT, reply_markup=MAIN_MENU, parse_mode="Markdown")
     await callback.answer()
 
 
 @callbacks_router.callback_query(F.data == "change_prayer_region")
 async def callback_change_prayer_region(callback: CallbackQuery):
     """Show region selection for prayer times"""
-    user_id = str(callback.from_user.id)
-
-    text = ModernUI.create_header("📍 HUDUDNI TANLANG")
-    text += "\n" + ModernUI.create_section(
-        "🌍 O'ZBEKISTON HUDUDLARI",
-        "Namaz vaqtlarini aniq olish uchun\n"
-        "hududingizni tanlang:"
-    )
-
-    # Create region selection keyboard inline
-    from app.services.prayer_service import PrayerService
-    prayer_service = PrayerService()
-    regions = prayer_service.get_regions()
-
-    keyboard_rows = []
-    # Split regions into rows of 2
-    for i in range(0, len(regions), 2):
-        row = []
-        for j in range(i, min(i + 2, len(regions))):
-            region = regions[j]
-            row.append(InlineKeyboardButton(text=region, callback_data=f"set_region_{region}"))
-        keyboard_rows.append(row)
-
-    # Add back button
-    keyboard_rows.append([InlineKeyboardButton(text="⬅️ Orqaga", callback_data="show_prayer_times")])
-
-    keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_rows)
-
-    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    await callback.message.edit_text(REGION_SELECTION_TEXT, reply_markup=REGION_KEYBOARD, parse_mode="Markdown")
     await callback.answer()
 
 
 @callbacks_router.callback_query(F.data == "toggle_prayer_notifications")
-async def callback_toggle_prayer_notifications(callback: CallbackQuery):
+async def callback_toggle_prayer_notifications(callback: CallbackQuery, user: Optional[User] = None):
     """Toggle prayer notifications on/off"""
-    user_id = str(callback.from_user.id)
-
-    async with async_session_factory() as session:
-        user_result = await session.execute(
-            select(User).where(User.id == user_id)
+    if not user:
+        await callback.answer("❌ Foydalanuvchi topilmadi.")
+        return
+
+    # Toggle prayer notifications on the already loaded user
+    user.prayer_notifications_enabled = not user.prayer_notifications_enabled
+
+    async with async_session_factory.begin() as session:
+        await session.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(prayer_notifications_enabled=user.prayer_notifications_enabled)
         )
-        user = user_result.scalar_one_or_none()
 
-        if not user:
-            await callback.answer("❌ Foydalanuvchi topilmadi.")
-            return
-
-        # Toggle prayer notifications
-        user.prayer_notifications_enabled = not user.prayer_notifications_enabled
-        await session.commit()
+    status = "yoqildi" if user.prayer_notifications_enabled else "o'chirildi"
+    await callback.answer(f"🕌 Namaz bildirishnomalari {status}!")
 
-        status = "yoqildi" if user.prayer_notifications_enabled else "o'chirildi"
-        await callback.answer(f"🕌 Namaz bildirishnomalari {status}!")
-
-        # Refresh the notification settings page
-        await callback_notification_settings(callback)
+    # Refresh the notification settings page off the request path
+    run_in_background(callback_notification_settings(callback, user), "Settings refresh")
 
 
 @callbacks_router.callback_query(F.data == "toggle_general_notifications")
-async def callback_toggle_general_notifications(callback: CallbackQuery):
+async def callback_toggle_general_notifications(callback: CallbackQuery, user: Optional[User] = None):
     """Toggle general notifications on/off"""
-    user_id = str(callback.from_user.id)
-
-    async with async_session_factory() as session:
-        user_result = await session.execute(
-            select(User).where(User.id == user_id)
+    if not user:
+        await callback.answer("❌ Foydalanuvchi topilmadi.")
+        return
+
+    # Toggle general notifications on the already loaded user
+    user.notifications_enabled = not user.notifications_enabled
+
+    async with async_session_factory.begin() as session:
+        await session.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(notifications_enabled=user.notifications_enabled)
         )
-        user = user_result.scalar_one_or_none()
-
-        if not user:
-            await callback.answer("❌ Foydalanuvchi topilmadi.")
-            return
 
-        # Toggle general notifications
-        user.notifications_enabled = not user.notifications_enabled
-        await session.commit()
+    # Re-enabled users' tasks were left out of the last reminder schedule
+    if user.notifications_enabled:
+        request_task_rescan()
 
-        status = "yoqildi" if user.notifications_enabled else "o'chirildi"
-        await callback.answer(f"📝 Vazifa bildirishnomalari {status}!")
+    status = "yoqildi" if user.notifications_enabled else "o'chirildi"
+    await callback.answer(f"📝 Vazifa bildirishnomalari {status}!")
 
-        # Refresh the notification settings page
-        await callback_notification_settings(callback)
+    # Refresh the notification settings page off the request path
+    run_in_background(callback_notification_settings(callback, user), "Settings refresh")
 
 
-@callbacks_router.callback_query(F.data.startswith("set_region_"))
-async def callback_set_region(callback: CallbackQuery):
+@callbacks_router.callback_query(RegionCB.filter())
+async def callback_set_region(callback: CallbackQuery, callback_data: RegionCB, user: Optional[User] = None):
     """Set user's prayer region"""
-    user_id = str(callback.from_user.id)
-    region = callback.data.replace("set_region_", "")
+    region = callback_data.region
 
-    async with async_session_factory() as session:
-        user_result = await session.execute(
-            select(User).where(User.id == user_id)
+    if not user:
+        await callback.answer("❌ Foydalanuvchi topilmadi.")
+        return
+
+    # Update user's prayer region
+    user.prayer_region = region
+
+    async with async_session_factory.begin() as session:
+        await session.execute(
+            update(User).where(User.id == user.id).values(prayer_region=region)
         )
-        user = user_result.scalar_one_or_none()
 
-        if not user:
-            await callback.answer("❌ Foydalanuvchi topilmadi.")
-            return
+    await callback.answer(f"📍 Hudud {region}ga o'zgartirildi!")
 
-        # Update user's prayer region
-        user.prayer_region = region
-        await session.commit()
+    # Go back to prayer times with new region
+    await callback_show_prayer_times(callback, user)
 
-        await callback.answer(f"📍 Hudud {region}ga o'zgartirildi!")
 
-        # Go back to prayer times with new region
-        await callback_show_prayer_times(callback)
\ No newline at end of file
+# Old-format "set_region_<name>" buttons from before RegionCB
+@callbacks_router.callback_query(F.data.startswith("set_region_"))
+async def callback_set_region_legacy(callback: CallbackQuery, user: Optional[User] = None):
+    """Set user's prayer region from an old-format button"""
+    region = callback.data.removeprefix("set_region_")
+    await callback_set_region(callback, RegionCB(region=region), user)
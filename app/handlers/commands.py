@@ -6,9 +6,9 @@ from aiogram import Router, F
 from aiogram.types import Message
 from aiogram.filters import Command
 
-from app.database import get_or_create_user, get_user, async_session_factory
+from app.database import get_or_create_user, get_user, get_user_with_task_counts
 from app.utils.keyboards import KeyboardBuilder
-from app.utils.formatters import ModernUI
+from app.utils.formatters import ModernUI, create_header, create_section
 from app.services.prayer_service import PrayerService
 from app.services.team_service import TeamService
 
@@ -19,11 +19,46 @@ keyboard_builder = KeyboardBuilder()
 prayer_service = PrayerService()
 team_service = TeamService()
 
+# Static menus, built once and shared by every request
+MAIN_MENU = keyboard_builder.main_menu()
+PROFILE_MENU = keyboard_builder.profile_menu()
+PRAYER_MENU = keyboard_builder.prayer_menu()
+TEAM_CREATION_MENU = keyboard_builder.team_creation_menu()
+
+# Static texts, rendered once at import
+HELP_TEXT = (
+    create_header("❓ YORDAM VA QO'LLANMA")
+    + "\n" + create_section(
+        "📝 ASOSIY BUYRUQLAR",
+        "/start - Botni ishga tushirish\n"
+        "/tasks - Barcha vazifalar\n"
+        "/add - Yangi vazifa qo'shish\n"
+        "/profile - Profil va statistika\n"
+        "/help - Bu yordam xabari\n"
+    )
+    + create_section(
+        "🕌 NAMAZ VAQTLARI",
+        "/prayer - Namaz vaqtlarini ko'rish\n"
+        "/prayer Toshkent - Toshkent namaz vaqtlari\n"
+        "/setprayerregion - Hududni tanlash\n"
+    )
+    + create_section(
+        "🔧 FUNKSIYALAR",
+        "🎯 ➕ **Vazifalar yaratish va boshqarish**\n"
+        "⏰ 🔔 **Vaqt va eslatmalar**\n"
+        "🏆 📁 **Prioritet va kategoriyalar**\n"
+        "👥 🤝 **Jamoa bilan ishlash**\n"
+        "🕌 📿 **Namaz vaqtlari va bildirishnomalar**\n"
+        "📊 📈 **Tahlil va hisobotlar**\n"
+    )
+    + "\n💡 **Maslahat:** Tugmalar orqali oson boshqaring!"
+)
+
 
 @commands_router.message(Command("start"))
 async def cmd_start(message: Message):
     """Handle /start command"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
 
     # Get or create user
     user = await get_or_create_user(
@@ -57,7 +92,7 @@ async def cmd_start(message: Message):
             "📋 Vazifalaringizni boshqarishda davom eting:"
         )
 
-    keyboard = keyboard_builder.main_menu()
+    keyboard = MAIN_MENU
 
     await message.answer(text, reply_markup=keyboard, parse_mode="Markdown")
 
@@ -65,7 +100,7 @@ async def cmd_start(message: Message):
 @commands_router.message(Command("tasks"))
 async def cmd_tasks(message: Message):
     """Handle /tasks command"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
     logger.info(f"User {user_id} requested tasks")
 
     # Redirect to main tasks view
@@ -76,7 +111,7 @@ async def cmd_tasks(message: Message):
 @commands_router.message(Command("add"))
 async def cmd_add(message: Message):
     """Handle /add command"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
     logger.info(f"User {user_id} wants to add task")
 
     # Set user state for task creation
@@ -93,33 +128,25 @@ async def cmd_add(message: Message):
 @commands_router.message(Command("profile"))
 async def cmd_profile(message: Message):
     """Handle /profile command"""
-    user_id = str(message.from_user.id)
-    user = await get_user(user_id)
+    user_id = message.from_user.id
+    profile = await get_user_with_task_counts(user_id)
 
-    if not user:
+    if not profile:
         await message.answer("❌ Foydalanuvchi topilmadi. /start ni bosing.")
         return
 
     logger.info(f"User {user_id} requested profile")
 
-    # Get user statistics
-    async with async_session_factory() as session:
-        tasks = await session.execute(
-            f"SELECT * FROM tasks WHERE user_id = '{user_id}'"
-        )
-        user_tasks = tasks.fetchall()
-
-        total = len(user_tasks)
-        completed = len([t for t in user_tasks if t.completed])
-        active = total - completed
+    user, completed, total = profile
+    active = total - completed
 
     progress_bar = ModernUI.create_progress_bar(completed, total)
 
-    profile_text = ModernUI.create_header(
+    profile_text = create_header(
         f"👤 {user.first_name or 'User'}",
         "*Shaxsiy profil*"
     )
-    profile_text += "\n" + ModernUI.create_section(
+    profile_text += "\n" + create_section(
         "📊 STATISTIKA",
         f"📝 **Jami:** {total} ta vazifa\n"
         f"✅ **Bajarilgan:** {completed} ta\n"
@@ -127,7 +154,7 @@ async def cmd_profile(message: Message):
         f"📈 **Bajarish darajasi:** {progress_bar}\n"
     )
 
-    keyboard = keyboard_builder.profile_menu()
+    keyboard = PROFILE_MENU
 
     await message.answer(profile_text, reply_markup=keyboard, parse_mode="Markdown")
 
@@ -135,42 +162,16 @@ async def cmd_profile(message: Message):
 @commands_router.message(Command("help"))
 async def cmd_help(message: Message):
     """Handle /help command"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
     logger.info(f"User {user_id} requested help")
 
-    help_text = ModernUI.create_header("❓ YORDAM VA QO'LLANMA")
-    help_text += "\n" + ModernUI.create_section(
-        "📝 ASOSIY BUYRUQLAR",
-        "/start - Botni ishga tushirish\n"
-        "/tasks - Barcha vazifalar\n"
-        "/add - Yangi vazifa qo'shish\n"
-        "/profile - Profil va statistika\n"
-        "/help - Bu yordam xabari\n"
-    )
-    help_text += ModernUI.create_section(
-        "🕌 NAMAZ VAQTLARI",
-        "/prayer - Namaz vaqtlarini ko'rish\n"
-        "/prayer Toshkent - Toshkent namaz vaqtlari\n"
-        "/setprayerregion - Hududni tanlash\n"
-    )
-    help_text += ModernUI.create_section(
-        "🔧 FUNKSIYALAR",
-        "🎯 ➕ **Vazifalar yaratish va boshqarish**\n"
-        "⏰ 🔔 **Vaqt va eslatmalar**\n"
-        "🏆 📁 **Prioritet va kategoriyalar**\n"
-        "👥 🤝 **Jamoa bilan ishlash**\n"
-        "🕌 📿 **Namaz vaqtlari va bildirishnomalar**\n"
-        "📊 📈 **Tahlil va hisobotlar**\n"
-    )
-    help_text += "\n💡 **Maslahat:** Tugmalar orqali oson boshqaring!"
-
-    await message.answer(help_text, parse_mode="Markdown")
+    await message.answer(HELP_TEXT, parse_mode="Markdown")
 
 
 @commands_router.message(Command("prayer"))
 async def cmd_prayer(message: Message):
     """Handle /prayer command"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
     user = await get_user(user_id)
 
     if not user:
@@ -188,7 +189,7 @@ async def cmd_prayer(message: Message):
         prayer_times = await prayer_service.get_prayer_times(region)
         formatted_times = prayer_service.format_for_display(prayer_times, region)
 
-        keyboard = keyboard_builder.prayer_menu()
+        keyboard = PRAYER_MENU
 
         await message.answer(formatted_times, reply_markup=keyboard, parse_mode="Markdown")
 
@@ -200,13 +201,13 @@ async def cmd_prayer(message: Message):
 @commands_router.message(Command("team"))
 async def cmd_team(message: Message):
     """Handle /team command"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
     logger.info(f"User {user_id} requested team info")
 
     user_teams = await team_service.get_user_teams(user_id)
 
     if not user_teams:
-        keyboard = keyboard_builder.team_creation_menu()
+        keyboard = TEAM_CREATION_MENU
 
         await message.answer(
             "👥 **Siz hech qaysi jamoada emassiz**\n\n"
@@ -223,31 +224,23 @@ async def cmd_team(message: Message):
 
     if len(user_teams) == 1:
         # Show single team
-        team = user_teams[0]
+        team, is_admin = user_teams[0]
         stats = await team_service.get_team_stats(team.id)
         keyboard = keyboard_builder.single_team_menu(team.id)
 
-        message_text = team_service.format_team_info(team, stats)
+        message_text = team_service.format_team_info(team, stats, "admin" if is_admin else "member")
 
         await message.answer(message_text, reply_markup=keyboard, parse_mode="Markdown")
     else:
         # Multiple teams - show selection
-        keyboard = keyboard_builder.multiple_teams_menu(user_teams)
-
-        message_text = f"👥 **SIZNING JAMOALARINGIZ ({len(user_teams)})**\n\n"
-        for i, team in enumerate(user_teams, 1):
-            stats = await team_service.get_team_stats(team.id)
-            role = "👑" if team.admin_id == user_id else "👤"
-            message_text += f"{i}. {role} **{team.name}**\n"
-            message_text += f"   🆔 `{team.id}` | 👥 {stats['total_members']} a'zo\n\n"
-
+        message_text, keyboard = await team_service.render_team_list(user_teams)
         await message.answer(message_text, reply_markup=keyboard, parse_mode="Markdown")
 
 
 @commands_router.message(Command("createteam"))
 async def cmd_create_team(message: Message):
     """Handle /createteam command"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
     logger.info(f"User {user_id} wants to create team")
 
     # Set user state for team creation
@@ -265,7 +258,7 @@ async def cmd_create_team(message: Message):
 @commands_router.message(Command("jointeam"))
 async def cmd_join_team(message: Message):
     """Handle /jointeam command"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
     logger.info(f"User {user_id} wants to join team")
 
     # Set user state for team joining
@@ -1,15 +1,22 @@
 """Text message handlers for conversation flows"""
 
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
 from aiogram import Router, F
 from aiogram.types import Message
+from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from sqlalchemy import update
 
 from app.database import async_session_factory, User, Task
 from app.utils.keyboards import KeyboardBuilder
+from app.middleware.auth import invalidate_user
+from app.utils.background import run_in_background
 from app.services.team_service import TeamService
+from app.services.notification_service import request_task_rescan
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +24,75 @@ messages_router = Router()
 keyboard_builder = KeyboardBuilder()
 team_service = TeamService()
 
+# Static menus, built once and shared by every request
+MAIN_MENU = keyboard_builder.main_menu()
+BACK_TO_MAIN_MENU = keyboard_builder.back_to_main_menu()
+TASK_CREATED_MENU = keyboard_builder.task_created_menu()
+
+# Reply templates, filled with str.format per request
+TASK_CREATED_TEMPLATE = (
+    "✅ **Vazifa yaratildi!**\n\n"
+    "📝 **Nomi:** {name}\n"
+    "📅 **Sana:** {due}\n"
+    "📁 **Kategoriya:** Personal\n"
+    "🏆 **Prioritet:** Medium\n"
+)
+TASK_NOTES_LINE = "📋 **Eslatma:** {notes}\n"
+TASK_SAVED_FOOTER = "\n🎉 **Vazifa muvaffaqiyatli saqlandi!**"
+
+TEAM_CREATED_TEMPLATE = (
+    "🎉 **Jamoa yaratildi!**\n\n"
+    "👥 **Nomi:** {name}\n"
+    "🆔 **Kod:** `{id}`\n"
+    "👑 **Admin:** Siz\n"
+    "📅 **Yaratilgan:** {day}\n\n"
+    "📤 **Kodni ulashing:** Boshqa foydalanuvchilar `{id}` kodi bilan jamoaga qo'shilishlari mumkin.\n\n"
+    "🎯 Endi vazifalar tayinlashingiz va jamoa bilan samarali ishlashingiz mumkin!"
+)
+
+TEAM_JOINED_TEMPLATE = (
+    "✅ **Jamoaga qo'shildingiz!**\n\n"
+    "👥 **Jamoa:** {name}\n"
+    "🆔 **Kod:** `{id}`\n"
+    "👤 **A'zolar:** {members} kishi\n"
+    "📝 **Vazifalar:** {tasks} ta\n"
+    "📅 **Qo'shilgan:** {day}\n\n"
+    "🎉 Endi jamoa vazifalarini ko'rishingiz va bajarishingiz mumkin!"
+)
+
+TASK_DUE_DISPLAY_FORMAT = "%d.%m.%Y %H:%M"
+
+# Input limits
+TASK_NAME_MIN_LENGTH, TASK_NAME_MAX_LENGTH = 3, 100
+TEAM_NAME_MIN_LENGTH, TEAM_NAME_MAX_LENGTH = 3, 50
+TEAM_CODE_LENGTH = 6
+
+
+# (monotonic second, formatted date): today's date is looked up at most once per second
+_today_cache = (-1, "")
+
+
+def _today_str() -> str:
+    """Today's date as shown in replies"""
+    global _today_cache
+    second = int(time.monotonic())
+    if second != _today_cache[0]:
+        _today_cache = (second, date.today().strftime("%d.%m.%Y"))
+    return _today_cache[1]
+
+
+async def _bump_tasks_created(user_id: int):
+    """Increment the user's created-tasks counter"""
+    async with async_session_factory.begin() as session:
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(total_tasks_created=User.total_tasks_created + 1)
+        )
+
+    # The middleware's cached copy no longer has the right counter
+    invalidate_user(user_id)
+
 
 class TaskStates(StatesGroup):
     """States for task creation"""
@@ -31,17 +107,34 @@ class TeamStates(StatesGroup):
     waiting_team_code = State()
 
 
-@messages_router.message(F.text, TaskStates.waiting_task_name)
+# Filters shared by every router below, built once
+HAS_TEXT = F.text
+IN_TASK_FLOW = StateFilter(TaskStates)
+IN_TEAM_FLOW = StateFilter(TeamStates)
+
+# One router per conversation so an update only reaches the handlers of its own flow;
+# the catch-all fallback is included last
+task_router = Router()
+task_router.message.filter(HAS_TEXT, IN_TASK_FLOW)
+team_router = Router()
+team_router.message.filter(HAS_TEXT, IN_TEAM_FLOW)
+fallback_router = Router()
+
+messages_router.include_routers(task_router, team_router, fallback_router)
+
+
+@task_router.message(TaskStates.waiting_task_name)
 async def handle_task_name(message: Message, state: FSMContext):
     """Handle task name input"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
     task_name = message.text.strip()
+    name_length = len(task_name)
 
-    if len(task_name) < 3:
+    if name_length < TASK_NAME_MIN_LENGTH:
         await message.answer("❌ Vazifa nomi juda qisqa. Kamida 3 ta belgi kiriting.")
         return
 
-    if len(task_name) > 100:
+    if name_length > TASK_NAME_MAX_LENGTH:
         await message.answer("❌ Vazifa nomi juda uzun. Maksimal 100 ta belgi.")
         return
 
@@ -57,10 +150,10 @@ async def handle_task_name(message: Message, state: FSMContext):
     await state.set_state(TaskStates.waiting_task_date)
 
 
-@messages_router.message(F.text, TaskStates.waiting_task_notes)
-async def handle_task_notes(message: Message, state: FSMContext):
+@task_router.message(TaskStates.waiting_task_notes)
+async def handle_task_notes(message: Message, state: FSMContext, user: Optional[User] = None):
     """Handle task notes input"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
     notes = message.text.strip()
 
     # Get data from state
@@ -71,13 +164,13 @@ async def handle_task_notes(message: Message, state: FSMContext):
     if notes.lower() in ['yo\'q', 'yoq', 'no']:
         notes = ""
 
+    due_date = datetime.fromisoformat(task_date)
+
     # Create the task
-    async with async_session_factory() as session:
-        # Get user
-        user_result = await session.execute(
-            f"SELECT * FROM users WHERE id = '{user_id}'"
-        )
-        user = user_result.fetchone()
+    async with async_session_factory.begin() as session:
+        # AuthMiddleware normally hands us the user; only look it up if it couldn't
+        if user is None:
+            user = await session.get(User, user_id)
 
         if not user:
             await message.answer("❌ Foydalanuvchi topilmadi.")
@@ -89,56 +182,49 @@ async def handle_task_notes(message: Message, state: FSMContext):
             user_id=user_id,
             name=task_name,
             notes=notes,
-            due_date=datetime.fromisoformat(task_date),
+            due_date=due_date,
             category="personal",
             priority="medium"
         )
 
         session.add(task)
-        await session.commit()
-        await session.refresh(task)
 
-        # Update user stats
-        await session.execute(
-            f"UPDATE users SET total_tasks_created = total_tasks_created + 1 WHERE id = '{user_id}'"
-        )
-        await session.commit()
+    # New reminders may come due before the notification service's next planned scan
+    request_task_rescan()
 
     # Clear state
     await state.clear()
 
     # Send confirmation
-    confirm_text = (
-        f"✅ **Vazifa yaratildi!**\n\n"
-        f"📝 **Nomi:** {task_name}\n"
-        f"📅 **Sana:** {datetime.fromisoformat(task_date).strftime('%d.%m.%Y %H:%M')}\n"
-        f"📁 **Kategoriya:** Personal\n"
-        f"🏆 **Prioritet:** Medium\n"
-    )
+    confirm_text = TASK_CREATED_TEMPLATE.format(name=task_name, due=due_date.strftime(TASK_DUE_DISPLAY_FORMAT))
 
     if notes:
-        confirm_text += f"📋 **Eslatma:** {notes}\n"
+        confirm_text += TASK_NOTES_LINE.format(notes=notes)
 
-    confirm_text += "\n🎉 **Vazifa muvaffaqiyatli saqlandi!**"
+    confirm_text += TASK_SAVED_FOOTER
 
-    keyboard = keyboard_builder.task_created_menu()
+    keyboard = TASK_CREATED_MENU
 
     await message.answer(confirm_text, reply_markup=keyboard, parse_mode="Markdown")
 
+    # The counter isn't shown in the confirmation, update it after replying
+    run_in_background(_bump_tasks_created(user_id), "Task counter update")
+
     logger.info(f"User {user_id} created task: {task_name}")
 
 
-@messages_router.message(F.text, TeamStates.waiting_team_name)
+@team_router.message(TeamStates.waiting_team_name)
 async def handle_team_name(message: Message, state: FSMContext):
     """Handle team name input"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
     team_name = message.text.strip()
+    name_length = len(team_name)
 
-    if len(team_name) < 3:
+    if name_length < TEAM_NAME_MIN_LENGTH:
         await message.answer("❌ Jamoa nomi juda qisqa. Kamida 3 ta belgi kiriting.")
         return
 
-    if len(team_name) > 50:
+    if name_length > TEAM_NAME_MAX_LENGTH:
         await message.answer("❌ Jamoa nomi juda uzun. Maksimal 50 ta belgi.")
         return
 
@@ -150,13 +236,7 @@ async def handle_team_name(message: Message, state: FSMContext):
         keyboard = keyboard_builder.team_created_menu(team.id)
 
         await message.answer(
-            f"🎉 **Jamoa yaratildi!**\n\n"
-            f"👥 **Nomi:** {team.name}\n"
-            f"🆔 **Kod:** `{team.id}`\n"
-            f"👑 **Admin:** Siz\n"
-            f"📅 **Yaratilgan:** {datetime.now().strftime('%d.%m.%Y')}\n\n"
-            f"📤 **Kodni ulashing:** Boshqa foydalanuvchilar `{team.id}` kodi bilan jamoaga qo'shilishlari mumkin.\n\n"
-            f"🎯 Endi vazifalar tayinlashingiz va jamoa bilan samarali ishlashingiz mumkin!",
+            TEAM_CREATED_TEMPLATE.format(name=team.name, id=team.id, day=_today_str()),
             reply_markup=keyboard,
             parse_mode="Markdown"
         )
@@ -168,32 +248,32 @@ async def handle_team_name(message: Message, state: FSMContext):
         await message.answer("❌ Jamoa yaratishda xatolik yuz berdi. Iltimos, qaytadan urinib ko'ring.")
 
 
-@messages_router.message(F.text, TeamStates.waiting_team_code)
+@team_router.message(TeamStates.waiting_team_code)
 async def handle_team_code(message: Message, state: FSMContext):
     """Handle team code input"""
-    user_id = str(message.from_user.id)
+    user_id = message.from_user.id
     team_code = message.text.strip().upper()
 
-    if len(team_code) != 6:
+    # Team codes are 6 ASCII letters/digits; reject anything else before touching the DB
+    if len(team_code) != TEAM_CODE_LENGTH or not (team_code.isascii() and team_code.isalnum()):
         await message.answer("❌ Jamoa kodi 6 ta belgidan iborat bo'lishi kerak. Qaytadan kiriting.")
         return
 
     try:
         # Join team
-        team = await team_service.join_team(team_code, user_id)
+        team, stats = await team_service.join_team_with_stats(team_code, user_id)
         await state.clear()
 
-        stats = await team_service.get_team_stats(team.id)
         keyboard = keyboard_builder.team_joined_menu(team.id)
 
         await message.answer(
-            f"✅ **Jamoaga qo'shildingiz!**\n\n"
-            f"👥 **Jamoa:** {team.name}\n"
-            f"🆔 **Kod:** `{team.id}`\n"
-            f"👤 **A'zolar:** {stats['total_members']} kishi\n"
-            f"📝 **Vazifalar:** {stats['total_tasks']} ta\n"
-            f"📅 **Qo'shilgan:** {datetime.now().strftime('%d.%m.%Y')}\n\n"
-            f"🎉 Endi jamoa vazifalarini ko'rishingiz va bajarishingiz mumkin!",
+            TEAM_JOINED_TEMPLATE.format(
+                name=team.name,
+                id=team.id,
+                members=stats['total_members'],
+                tasks=stats['total_tasks'],
+                day=_today_str()
+            ),
             reply_markup=keyboard,
             parse_mode="Markdown"
         )
@@ -211,11 +291,10 @@ async def handle_team_code(message: Message, state: FSMContext):
             await message.answer("❌ Jamoaga qo'shilishda xatolik yuz berdi. Iltimos, qaytadan urinib ko'ring.")
 
 
-@messages_router.message(F.text)
+@fallback_router.message(HAS_TEXT)
 async def handle_text_message(message: Message, state: FSMContext):
     """Handle general text messages"""
-    user_id = str(message.from_user.id)
-    text = message.text.strip()
+    user_id = message.from_user.id
 
     # Get current state
     current_state = await state.get_state()
@@ -224,13 +303,13 @@ async def handle_text_message(message: Message, state: FSMContext):
         # User is in a conversation flow but message wasn't handled
         await message.answer(
             "❓ Buyruq tanilmadi. Iltimos, so'ralgan ma'lumotni kiriting yoki /start ni bosing.",
-            reply_markup=keyboard_builder.back_to_main_menu()
+            reply_markup=BACK_TO_MAIN_MENU
         )
     else:
         # No active conversation, show help
         await message.answer(
             "❓ Buyruq tanilmadi. Yordam uchun /help ni bosing yoki tugmalardan foydalaning.",
-            reply_markup=keyboard_builder.main_menu()
+            reply_markup=MAIN_MENU
         )
 
-    logger.debug(f"Unhandled text message from {user_id}: {text}")
\ No newline at end of file
+    logger.debug("Unhandled text message from %s: %s", user_id, message.text)
\ No newline at end of file
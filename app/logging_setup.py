@@ -0,0 +1,15 @@
+"""Logging configuration shared by the entry points"""
+
+import logging
+
+from app.config import settings
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def setup_logging():
+    """Configure the root logger once, at the level from settings"""
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO),
+        format=LOG_FORMAT
+    )
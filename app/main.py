@@ -1,27 +1,59 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response
 from contextlib import asynccontextmanager
 import logging
+from telegram import Update
 from app.config import settings
+from app.logging_setup import setup_logging
 from app.bot.bot import bot_application
-from app.database import init_db
+from app.services.prayer_service import init_http_client, close_http_client
+from app.database import init_db, close_db
 
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+WEBHOOK_PATH = "/telegram/webhook"
+# Checked on every pushed update
+WEBHOOK_SECRET = settings.WEBHOOK_SECRET
+
+# Static bodies for the probe endpoints, serialized once instead of on every hit
+ROOT_RESPONSE_BODY = b'{"message":"Prayer Times Bot API","version":"2.0.0"}'
+HEALTH_RESPONSE_BODY = b'{"status":"healthy"}'
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting up...")
     await init_db()
+    await init_http_client()
     await bot_application.initialize()
+
+    # Telegram pushes updates to us in production; fall back to polling locally
+    if settings.WEBHOOK_URL:
+        await bot_application.bot.set_webhook(
+            url=f"{settings.WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES
+        )
+        logger.info("Webhook set, receiving updates via FastAPI")
+    else:
+        await bot_application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+        logger.info("No WEBHOOK_URL configured, polling for updates")
+
     await bot_application.start()
     yield
     logger.info("Shutting down...")
+    if bot_application.updater.running:
+        await bot_application.updater.stop()
     await bot_application.stop()
+    await bot_application.shutdown()
+    await close_http_client()
+    await close_db()
 
 app = FastAPI(
     title="Prayer Times Telegram Bot API",
     description="FastAPI backend for Prayer Times Telegram Bot with task management",
     version="2.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -29,8 +61,19 @@ app = FastAPI(
 
 @app.get("/")
 async def root():
-    return {"message": "Prayer Times Bot API", "version": "2.0.0"}
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
+
+@app.post(WEBHOOK_PATH)
+async def telegram_webhook(request: Request):
+    """Receive updates pushed by Telegram"""
+    if WEBHOOK_SECRET and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != WEBHOOK_SECRET:
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+
+    data = await request.json()
+    await bot_application.update_queue.put(Update.de_json(data, bot_application.bot))
+    # Telegram only looks at the status code
+    return Response(status_code=204)
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return Response(content=HEALTH_RESPONSE_BODY, media_type="application/json")
\ No newline at end of file
@@ -6,9 +6,21 @@ from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery
 
 from app.database import get_or_create_user
+from app.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Active users press buttons in bursts; re-reading their row on every update is wasted work
+USER_CACHE_TTL = 300
+USER_CACHE_MAX_SIZE = 50_000
+
+_user_cache = TTLCache(USER_CACHE_TTL, USER_CACHE_MAX_SIZE)
+
+
+def invalidate_user(user_id: int):
+    """Drop a cached user after their row was changed outside the cached object"""
+    _user_cache.pop(user_id)
+
 
 class AuthMiddleware(BaseMiddleware):
     """Middleware for user authentication and initialization"""
@@ -34,25 +46,28 @@ class AuthMiddleware(BaseMiddleware):
             return await handler(event, data)
 
         try:
-            # Get or create user in database
-            user = await get_or_create_user(
-                user_id=str(user_info.id),
-                first_name=user_info.first_name,
-                last_name=user_info.last_name,
-                username=user_info.username
-            )
+            user = _user_cache.get(user_info.id)
+            if user is None:
+                # Get or create user in database; concurrent misses share one lookup there
+                user = await get_or_create_user(
+                    user_id=user_info.id,
+                    first_name=user_info.first_name,
+                    last_name=user_info.last_name,
+                    username=user_info.username
+                )
+                _user_cache.set(user_info.id, user)
 
             # Add user to context
             data['user'] = user
-            data['user_id'] = str(user_info.id)
+            data['user_id'] = user_info.id
 
-            logger.debug(f"User {user_info.id} authenticated successfully")
+            logger.debug("User %s authenticated successfully", user_info.id)
 
         except Exception as e:
             logger.error(f"Failed to authenticate user {user_info.id}: {e}")
             # Continue without user data
             data['user'] = None
-            data['user_id'] = str(user_info.id) if user_info else None
+            data['user_id'] = user_info.id
 
         # Continue to handler
         return await handler(event, data)
\ No newline at end of file
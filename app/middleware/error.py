@@ -7,6 +7,28 @@ from aiogram.types import Message, CallbackQuery, ErrorEvent
 
 logger = logging.getLogger(__name__)
 
+ERROR_MESSAGE = (
+    "❌ **Xatolik yuz berdi**\n\n"
+    "Iltimos, qaytadan urinib ko'ring yoki /start buyrug'ini bosing.\n\n"
+    "Agar muammo davom etsa, administratorga murojaat qiling."
+)
+
+
+async def _reply_to_message(event: Message):
+    await event.answer(ERROR_MESSAGE, parse_mode="Markdown")
+
+
+async def _reply_to_callback(event: CallbackQuery):
+    await event.message.edit_text(ERROR_MESSAGE, parse_mode="Markdown")
+    await event.answer("Xatolik yuz berdi")
+
+
+# How to tell the user something went wrong, by event type
+ERROR_REPLIES = {
+    Message: _reply_to_message,
+    CallbackQuery: _reply_to_callback,
+}
+
 
 class ErrorMiddleware(BaseMiddleware):
     """Middleware for error handling"""
@@ -28,25 +50,17 @@ class ErrorMiddleware(BaseMiddleware):
 
         except Exception as e:
             # Log the error
-            user_id = getattr(event.from_user, 'id', 'unknown') if hasattr(event, 'from_user') else 'unknown'
+            from_user = getattr(event, 'from_user', None)
+            user_id = from_user.id if from_user else 'unknown'
             logger.error(f"Error in handler for user {user_id}: {e}", exc_info=True)
 
             # Try to send error message to user
-            try:
-                error_message = (
-                    "❌ **Xatolik yuz berdi**\n\n"
-                    "Iltimos, qaytadan urinib ko'ring yoki /start buyrug'ini bosing.\n\n"
-                    "Agar muammo davom etsa, administratorga murojaat qiling."
-                )
-
-                if isinstance(event, Message):
-                    await event.answer(error_message, parse_mode="Markdown")
-                elif isinstance(event, CallbackQuery):
-                    await event.message.edit_text(error_message, parse_mode="Markdown")
-                    await event.answer("Xatolik yuz berdi")
-
-            except Exception as send_error:
-                logger.error(f"Failed to send error message: {send_error}")
+            reply = ERROR_REPLIES.get(type(event))
+            if reply is not None:
+                try:
+                    await reply(event)
+                except Exception as send_error:
+                    logger.error(f"Failed to send error message: {send_error}")
 
             # Re-raise for debugging in development
             if __debug__:
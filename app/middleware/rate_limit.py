@@ -0,0 +1,44 @@
+"""Outgoing request rate limiting middleware"""
+
+import asyncio
+import logging
+
+from aiolimiter import AsyncLimiter
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, GetUpdates, TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+logger = logging.getLogger(__name__)
+
+# Calls that don't deliver a message and shouldn't wait behind queued sends
+UNTHROTTLED_METHODS = (GetUpdates, AnswerCallbackQuery)
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """Keep outgoing Bot API calls under Telegram's bot-wide limit and honour flood waits"""
+
+    def __init__(self, max_rate: float = 30, time_period: float = 1, max_retries: int = 3):
+        self.limiter = AsyncLimiter(max_rate, time_period)
+        self.max_retries = max_retries
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        """Throttle the request and retry it after a RetryAfter"""
+        if isinstance(method, UNTHROTTLED_METHODS):
+            return await make_request(bot, method)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.limiter:
+                    return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"Flood control on {type(method).__name__}, retrying in {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
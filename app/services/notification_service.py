@@ -2,19 +2,130 @@
 
 import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from functools import lru_cache, partial
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
 
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramNotFound
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, or_, delete, func, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncResult
+from sqlalchemy.engine import Row
 
 from app.database import async_session_factory, User, Task, PrayerNotification
 from app.services.prayer_service import PrayerService
-from app.utils.formatters import ModernUI
+from app.utils.formatters import ModernUI, PRIORITY_EMOJI
+from app.utils.callback_data import TaskCB
+from app.utils.background import run_in_background
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on sends in flight; the bot session's rate limiter paces them to Telegram's limit
+MAX_CONCURRENT_SENDS = 30
+
+# How many minutes before each target a reminder may still go out
+TASK_NOTIFICATION_WINDOW = 5
+PRAYER_NOTIFICATION_WINDOW = 2
+
+# Even when no reminder is known to be coming, rescan tasks this often to catch rows
+# written or changed without request_task_rescan() (e.g. by the other bot process).
+# Kept shorter than the send window so such a task still gets every reminder.
+TASK_RESCAN_INTERVAL = timedelta(minutes=TASK_NOTIFICATION_WINDOW - 1)
+
+# Only what the reminder text, keyboard and sent flags need, not full Task objects
+TASK_NOTIFICATION_COLUMNS = (
+    Task.id, Task.user_id, Task.name, Task.due_date, Task.category, Task.priority,
+    Task.notification_1day_sent, Task.notification_1hour_sent,
+    Task.notification_15min_sent, Task.notification_due_sent
+)
+
+# Earliest moment a task reminder can come due; None forces a scan on the next tick
+_next_task_check: Optional[datetime] = None
+
+# Sent-prayer records are only consulted for the current day; keep a week for debugging
+PRAYER_NOTIFICATION_RETENTION_DAYS = 7
+
+
+def _build_minute_buckets(intervals: List[Dict], window: int) -> Dict[int, Dict]:
+    """Map every whole minute inside an interval's send window to that interval"""
+    return {
+        minute: interval
+        for interval in intervals
+        for minute in range(interval["minutes"] - window + 1, interval["minutes"] + 1)
+    }
+
+
+PRAYER_NAMES = {
+    "Fajr": "🌅 Bomdod",
+    "Dhuhr": "🌞 Peshin",
+    "Asr": "🌇 Asr",
+    "Maghrib": "🌆 Shom",
+    "Isha": "🌃 Xufton"
+}
+
+TASK_DUE_TEMPLATE = (
+    "⏰ **VAZIFA VAQTI KELDI!**\n\n"
+    "{emoji} **{name}**\n\n"
+    "📅 **Sana:** {date}\n"
+    "📁 **Kategoriya:** {category}\n\n"
+    "🎯 Hozir bajarish vaqti!"
+)
+
+TASK_UPCOMING_TEMPLATE = (
+    "⏰ **VAZIFA ESLATMASI**\n\n"
+    "{emoji} **{name}**\n\n"
+    "📅 **Sana:** {date}\n"
+    "⏳ **Qolgan vaqt:** {remaining}\n"
+    "📁 **Kategoriya:** {category}\n\n"
+    "💡 Tayyorgarlik ko'ring!"
+)
+
+PRAYER_TEMPLATE = (
+    "🕌 **NAMAZ VAQTI ESLATMASI**\n\n"
+    "{prayer_name} namazi {minutes} daqiqadan keyin\n\n"
+    "⏰ **Vaqt:** {time}\n"
+    "📍 **Hudud:** {region}\n\n"
+    "🤲 Tahorat oling va tayyorgarlik ko'ring!"
+)
+
+
+PRAYER_NOTIFICATION_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="🕌 Namaz vaqtlari", callback_data="show_prayer_times"),
+        InlineKeyboardButton(text="🔕 O'chirish", callback_data="disable_prayer_notifications")
+    ]
+])
+
+
+@lru_cache(maxsize=4096)
+def _task_notification_keyboard(task_id: int) -> InlineKeyboardMarkup:
+    """A task's reminders all carry the same keyboard, build it once per task"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="✅ Bajarildi", callback_data=TaskCB(task_id=task_id).pack()),
+            InlineKeyboardButton(text="📋 Vazifalar", callback_data="back_to_main_tasks")
+        ]
+    ])
+
+
+def request_task_rescan():
+    """Make the next tick scan tasks, call after creating or rescheduling a task"""
+    global _next_task_check
+    _next_task_check = None
+
+
+class PendingNotification(NamedTuple):
+    """A reminder ready to send, with the bookkeeping to run once it's delivered"""
+    chat_id: int
+    text: str
+    reply_markup: object
+    on_sent: Callable[[], None]
+    description: str
+
 
 class NotificationService:
     """Handle task and prayer notifications"""
@@ -25,6 +136,11 @@ class NotificationService:
         self.bot = bot
         self.is_running = False
 
+        # Delivered notifications waiting to be written at the end of the tick
+        self._pending_task_marks: Dict[str, List[int]] = defaultdict(list)
+        self._pending_prayer_records: List[Dict] = []
+        self._pending_blocked_users: Set[int] = set()
+
         # Notification intervals for tasks (in minutes)
         self.task_intervals = [
             {"id": "1day", "name": "1 kun oldin", "minutes": 24 * 60},
@@ -39,6 +155,10 @@ class NotificationService:
             {"id": "5min", "name": "5 daqiqa oldin", "minutes": 5}
         ]
 
+        # minutes-until-target -> interval, replaces scanning every interval per task/prayer
+        self._task_buckets = _build_minute_buckets(self.task_intervals, TASK_NOTIFICATION_WINDOW)
+        self._prayer_buckets = _build_minute_buckets(self.prayer_intervals, PRAYER_NOTIFICATION_WINDOW)
+
     async def start(self):
         """Start the notification service"""
         if self.is_running:
@@ -55,10 +175,40 @@ class NotificationService:
             max_instances=1
         )
 
+        self.scheduler.add_job(
+            self._purge_old_prayer_notifications,
+            CronTrigger(hour=3, minute=0),
+            id="prayer_notification_purge",
+            max_instances=1
+        )
+
         self.scheduler.start()
         self.is_running = True
+
+        # Warm the shared prayer-times cache so the first tick doesn't fetch per region inline
+        run_in_background(self._preload_prayer_times(), "Prayer times preload")
+
         logger.info("✅ Notification service started")
 
+    async def _purge_old_prayer_notifications(self):
+        """Drop sent-prayer records older than the retention window"""
+        cutoff = date.today() - timedelta(days=PRAYER_NOTIFICATION_RETENTION_DAYS)
+        try:
+            async with async_session_factory.begin() as session:
+                result = await session.execute(
+                    delete(PrayerNotification).where(PrayerNotification.date < cutoff)
+                )
+            logger.info(f"🧹 Purged {result.rowcount} prayer notification records before {cutoff}")
+        except Exception as e:
+            logger.error(f"Failed to purge prayer notification records: {e}")
+
+    async def _preload_prayer_times(self):
+        """Fetch today's prayer times for every supported region"""
+        regions = self.prayer_service.get_regions()
+        results = await asyncio.gather(*(self.prayer_service.get_prayer_times(region) for region in regions))
+        loaded = sum(1 for prayer_times in results if prayer_times)
+        logger.info(f"🕌 Preloaded prayer times for {loaded}/{len(regions)} regions")
+
     async def stop(self):
         """Stop the notification service"""
         if not self.is_running:
@@ -72,26 +222,40 @@ class NotificationService:
     async def check_notifications(self):
         """Main notification check function"""
         now = datetime.utcnow()
-        logger.debug(f"⏰ Checking notifications at: {now}")
+        logger.debug("⏰ Checking notifications at: %s", now)
 
         total_notifications = 0
+        today = now.date()
 
         try:
-            async with async_session_factory() as session:
-                # Get all active users
-                users_result = await session.execute(
-                    select(User).where(User.blocked_bot == False)
-                )
-                users = users_result.scalars().all()
-
-                for user in users:
-                    # Check task notifications
-                    task_notifications = await self._check_task_notifications(user, now)
-                    total_notifications += task_notifications
-
-                    # Check prayer notifications
-                    prayer_notifications = await self._check_prayer_notifications(user, now)
-                    total_notifications += prayer_notifications
+            scan_tasks = _next_task_check is None or now >= _next_task_check
+            prayer_regions = await self._get_regions_with_prayer_due(now)
+
+            pending: List[PendingNotification] = []
+            prayer_users: List[Tuple[int, str]] = []
+            sent_prayer_notifications: FrozenSet[Tuple[int, str, str]] = frozenset()
+
+            # Idle ticks skip the database entirely; otherwise at most three queries, not a few per user
+            if scan_tasks or prayer_regions:
+                async with async_session_factory() as session:
+                    if scan_tasks:
+                        # Rows are checked as they arrive instead of after the whole result is built
+                        async for task in await self._stream_tasks_in_notification_windows(session, now):
+                            pending.extend(self._check_task_notifications(task, now))
+                    if prayer_regions:
+                        prayer_users = await self._get_prayer_notification_users(session, prayer_regions)
+                        sent_prayer_notifications = await self._get_sent_prayer_notifications(session, today)
+
+            for user_id, region in prayer_users:
+                pending.extend(await self._check_prayer_notifications(
+                    user_id, region, now, today, sent_prayer_notifications
+                ))
+
+            total_notifications = await self._send_notifications(pending)
+            await self._flush_notification_state()
+
+            if scan_tasks:
+                await self._schedule_next_task_check(now)
 
             if total_notifications > 0:
                 logger.info(f"📬 Sent {total_notifications} notifications")
@@ -99,75 +263,145 @@ class NotificationService:
         except Exception as e:
             logger.error(f"Error in notification check: {e}")
 
-    async def _check_task_notifications(self, user: User, now: datetime) -> int:
-        """Check and send task notifications for a user"""
-        if not user.notifications_enabled:
-            return 0
+    async def _stream_tasks_in_notification_windows(self, session, now: datetime) -> AsyncResult:
+        """Open tasks of reachable users whose due date falls in one of the reminder windows"""
+        # Each window only matches tasks whose reminder for that interval hasn't gone out, so
+        # the rows returned are (almost) exactly the ones to send. The range is a little wider
+        # than the whole-minute bucket check, which still runs on each row.
+        windows = [
+            and_(
+                Task.due_date.between(
+                    now + timedelta(minutes=interval["minutes"] - TASK_NOTIFICATION_WINDOW),
+                    now + timedelta(minutes=interval["minutes"] + 1)
+                ),
+                getattr(Task, f"notification_{interval['id']}_sent").isnot(True)
+            )
+            for interval in self.task_intervals
+        ]
 
-        notifications_sent = 0
+        return await session.stream(
+            select(*TASK_NOTIFICATION_COLUMNS)
+            .join(User, Task.user_id == User.id)
+            .where(
+                and_(
+                    User.blocked_bot == False,
+                    User.notifications_enabled == True,
+                    Task.completed == False,
+                    or_(*windows)
+                )
+            )
+            .execution_options(yield_per=500)
+        )
 
+    async def _schedule_next_task_check(self, now: datetime):
+        """Work out when the next task reminder window opens so ticks before it can skip the scan"""
+        global _next_task_check
+
+        # Earliest unsent due date per interval, counting tasks whose window is already open
+        # so a send that failed this tick is retried on the next one
         async with async_session_factory() as session:
-            # Get user's active tasks
-            tasks_result = await session.execute(
-                select(Task).where(
+            result = await session.execute(
+                select(*(
+                    func.min(Task.due_date).filter(
+                        and_(
+                            getattr(Task, f"notification_{interval['id']}_sent").isnot(True),
+                            Task.due_date > now + timedelta(minutes=interval["minutes"] - TASK_NOTIFICATION_WINDOW)
+                        )
+                    )
+                    for interval in self.task_intervals
+                ))
+                .select_from(Task)
+                .join(User, Task.user_id == User.id)
+                .where(
                     and_(
-                        Task.user_id == user.id,
+                        User.blocked_bot == False,
+                        User.notifications_enabled == True,
                         Task.completed == False
                     )
                 )
             )
-            tasks = tasks_result.scalars().all()
-
-            for task in tasks:
-                if not task.due_date:
-                    continue
-
-                time_diff = task.due_date - now
-                minutes_until_due = int(time_diff.total_seconds() / 60)
+            earliest_dues = result.one()
 
-                # Check each notification interval
-                for interval in self.task_intervals:
-                    if await self._should_send_task_notification(task, interval, minutes_until_due):
-                        try:
-                            message = self._get_task_notification_message(task, interval, minutes_until_due)
+        next_check = now + TASK_RESCAN_INTERVAL
+        for interval, earliest_due in zip(self.task_intervals, earliest_dues):
+            if earliest_due is not None:
+                window_opens = earliest_due - timedelta(minutes=interval["minutes"] + TASK_NOTIFICATION_WINDOW)
+                next_check = min(next_check, window_opens)
 
-                            # Use bot instance from service
-                            bot = self.bot
+        _next_task_check = next_check
 
-                            await bot.send_message(
-                                chat_id=user.id,
-                                text=message,
-                                parse_mode="Markdown",
-                                reply_markup=self._get_task_notification_keyboard(task)
-                            )
-
-                            # Mark notification as sent
-                            await self._mark_task_notification_sent(task, interval)
-                            notifications_sent += 1
-
-                            logger.info(f"📤 Task notification sent to user {user.id}: \"{task.name}\" ({interval['name']})")
-
-                        except Exception as e:
-                            if await self._is_user_blocked_error(e):
-                                await self._mark_user_as_blocked(user.id)
-                            else:
-                                logger.error(f"Failed to send task notification to user {user.id}: {e}")
-
-        return notifications_sent
-
-    async def _check_prayer_notifications(self, user: User, now: datetime) -> int:
-        """Check and send prayer notifications for a user"""
-        if not user.prayer_notifications_enabled or not user.prayer_region:
-            return 0
+    async def _get_regions_with_prayer_due(self, now: datetime) -> Set[str]:
+        """Regions with a prayer inside one of the reminder windows right now"""
+        regions = set()
+        for region in self.prayer_service.get_regions():
+            prayer_times = await self.prayer_service.get_prayer_times(region)
+            if not prayer_times:
+                continue
 
-        notifications_sent = 0
-        today = now.date().isoformat()
+            for prayer_time_str in prayer_times.values():
+                prayer_time = self._parse_prayer_time(prayer_time_str, now)
+                minutes_until_prayer = int((prayer_time - now).total_seconds() / 60)
+                if minutes_until_prayer in self._prayer_buckets:
+                    regions.add(region)
+                    break
+
+        return regions
+
+    async def _get_prayer_notification_users(self, session, regions: Set[str]) -> List[Tuple[int, str]]:
+        """(user_id, region) for every reachable user in the given regions with prayer reminders on"""
+        result = await session.execute(
+            select(User.id, User.prayer_region).where(
+                and_(
+                    User.blocked_bot == False,
+                    User.prayer_notifications_enabled == True,
+                    User.prayer_region.in_(regions)
+                )
+            )
+        )
+        return result.all()
+
+    async def _get_sent_prayer_notifications(self, session, today: date) -> FrozenSet[Tuple[int, str, str]]:
+        """(user_id, prayer, notification_type) already sent today"""
+        result = await session.execute(
+            select(
+                PrayerNotification.user_id,
+                PrayerNotification.prayer_name,
+                PrayerNotification.notification_type
+            ).where(PrayerNotification.date == today)
+        )
+        return frozenset(tuple(row) for row in result.all())
+
+    def _check_task_notifications(self, task: Row, now: datetime) -> List[PendingNotification]:
+        """Collect the reminders due for a task"""
+        pending = []
+
+        time_diff = task.due_date - now
+        minutes_until_due = int(time_diff.total_seconds() / 60)
+
+        # Windows don't overlap, so at most one interval applies
+        interval = self._task_buckets.get(minutes_until_due)
+        if interval is not None and not getattr(task, f"notification_{interval['id']}_sent", False):
+            pending.append(PendingNotification(
+                chat_id=task.user_id,
+                text=self._get_task_notification_message(task, interval, minutes_until_due),
+                reply_markup=self._get_task_notification_keyboard(task),
+                on_sent=partial(self._mark_task_notification_sent, task, interval),
+                description=f"Task notification \"{task.name}\" ({interval['name']})"
+            ))
+
+        return pending
+
+    async def _check_prayer_notifications(
+        self, user_id: int, region: str, now: datetime, today: date, sent: FrozenSet[Tuple[int, str, str]]
+    ) -> List[PendingNotification]:
+        """Collect the prayer reminders due for a user"""
+        pending = []
 
         try:
             # Get prayer times for user's region
-            prayer_times = await self.prayer_service.get_prayer_times(user.prayer_region)
+            prayer_times = await self.prayer_service.get_prayer_times(region)
             if not prayer_times:
-                return 0
+                return pending
 
             prayers = ["Fajr", "Dhuhr", "Asr", "Maghrib", "Isha"]
 
@@ -180,204 +414,153 @@ class NotificationService:
                 time_diff = prayer_time - now
                 minutes_until_prayer = int(time_diff.total_seconds() / 60)
 
-                # Check each prayer notification interval
-                for interval in self.prayer_intervals:
-                    if await self._should_send_prayer_notification(
-                        user, prayer, interval, minutes_until_prayer, today
-                    ):
-                        try:
-                            message = self._get_prayer_notification_message(
-                                prayer, prayer_time_str, interval, user.prayer_region
-                            )
-
-                            # Use bot instance from service
-                            bot = self.bot
-
-                            await bot.send_message(
-                                chat_id=user.id,
-                                text=message,
-                                parse_mode="Markdown",
-                                reply_markup=self._get_prayer_notification_keyboard()
-                            )
-
-                            # Record notification
-                            await self._record_prayer_notification(user.id, today, prayer, interval["id"])
-                            notifications_sent += 1
-
-                            logger.info(f"🕌 Prayer notification sent to user {user.id}: {prayer} in {interval['minutes']} minutes")
-
-                        except Exception as e:
-                            if await self._is_user_blocked_error(e):
-                                await self._mark_user_as_blocked(user.id)
-                            else:
-                                logger.error(f"Failed to send prayer notification to user {user.id}: {e}")
+                interval = self._prayer_buckets.get(minutes_until_prayer)
+                if interval is not None and (user_id, prayer, interval["id"]) not in sent:
+                    pending.append(PendingNotification(
+                        chat_id=user_id,
+                        text=self._get_prayer_notification_message(prayer, prayer_time_str, interval, region),
+                        reply_markup=self._get_prayer_notification_keyboard(),
+                        on_sent=partial(self._record_prayer_notification, user_id, today, prayer, interval["id"]),
+                        description=f"Prayer notification {prayer} in {interval['minutes']} minutes"
+                    ))
 
         except Exception as e:
-            logger.error(f"Error checking prayer notifications for user {user.id}: {e}")
-
-        return notifications_sent
-
-    async def _should_send_task_notification(self, task: Task, interval: Dict, minutes_until_due: int) -> bool:
-        """Check if task notification should be sent"""
-        target_minutes = interval["minutes"]
-
-        # Check if it's time for this notification (5-minute window)
-        is_time_for_notification = (
-            minutes_until_due <= target_minutes and
-            minutes_until_due > (target_minutes - 5)
-        )
-
-        if not is_time_for_notification:
-            return False
+            logger.error(f"Error checking prayer notifications for user {user_id}: {e}")
 
-        # Check if notification already sent
-        notification_field = f"notification_{interval['id']}_sent"
-        return not getattr(task, notification_field, False)
+        return pending
 
-    async def _should_send_prayer_notification(
-        self, user: User, prayer: str, interval: Dict, minutes_until_prayer: int, today: str
-    ) -> bool:
-        """Check if prayer notification should be sent"""
-        target_minutes = interval["minutes"]
+    async def _send_notifications(self, pending: List[PendingNotification]) -> int:
+        """Send collected notifications concurrently, returning how many went out"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        # Telegram allows about one message per second per chat, so a chat's messages go one at a time
+        chat_locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
 
-        # Check if it's time for this notification (2-minute window for prayers)
-        is_time_for_notification = (
-            minutes_until_prayer <= target_minutes and
-            minutes_until_prayer > (target_minutes - 2)
+        results = await asyncio.gather(
+            *(self._send_notification(item, semaphore, chat_locks[item.chat_id]) for item in pending)
         )
-
-        if not is_time_for_notification:
-            return False
-
-        # Check if notification already sent today
-        async with async_session_factory() as session:
-            existing_result = await session.execute(
-                select(PrayerNotification).where(
-                    and_(
-                        PrayerNotification.user_id == user.id,
-                        PrayerNotification.date == today,
-                        PrayerNotification.prayer_name == prayer,
-                        PrayerNotification.notification_type == interval["id"]
-                    )
+        return sum(results)
+
+    async def _send_notification(self, item: PendingNotification, semaphore: asyncio.Semaphore, chat_lock: asyncio.Lock) -> bool:
+        """Send one notification and record it, handling users who blocked the bot"""
+        async with chat_lock, semaphore:
+            try:
+                await self.bot.send_message(
+                    chat_id=item.chat_id,
+                    text=item.text,
+                    parse_mode="Markdown",
+                    reply_markup=item.reply_markup
                 )
-            )
-            existing = existing_result.scalar_one_or_none()
-            return existing is None
-
-    def _get_task_notification_message(self, task: Task, interval: Dict, minutes_until_due: int) -> str:
+            except (TelegramForbiddenError, TelegramNotFound):
+                self._mark_user_as_blocked(item.chat_id)
+                return False
+            except TelegramBadRequest as e:
+                if self._is_user_blocked_error(e):
+                    self._mark_user_as_blocked(item.chat_id)
+                else:
+                    logger.error(f"Failed to send notification to user {item.chat_id}: {e}")
+                return False
+            except Exception as e:
+                logger.error(f"Failed to send notification to user {item.chat_id}: {e}")
+                return False
+
+        logger.info(f"📤 {item.description} sent to user {item.chat_id}")
+        item.on_sent()
+        return True
+
+    def _get_task_notification_message(self, task: Row, interval: Dict, minutes_until_due: int) -> str:
         """Generate task notification message"""
-        time_remaining = self._format_time_remaining(max(0, minutes_until_due))
-        priority_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(task.priority, "⚪")
+        ctx = {
+            "emoji": PRIORITY_EMOJI.get(task.priority, "⚪"),
+            "name": task.name,
+            "date": self._format_date(task.due_date),
+            "category": task.category or "Umumiy",
+        }
 
         if interval["id"] == "due":
-            return (
-                f"⏰ **VAZIFA VAQTI KELDI!**\n\n"
-                f"{priority_emoji} **{task.name}**\n\n"
-                f"📅 **Sana:** {self._format_date(task.due_date)}\n"
-                f"📁 **Kategoriya:** {task.category or 'Umumiy'}\n\n"
-                f"🎯 Hozir bajarish vaqti!"
-            )
-        else:
-            return (
-                f"⏰ **VAZIFA ESLATMASI**\n\n"
-                f"{priority_emoji} **{task.name}**\n\n"
-                f"📅 **Sana:** {self._format_date(task.due_date)}\n"
-                f"⏳ **Qolgan vaqt:** {time_remaining}\n"
-                f"📁 **Kategoriya:** {task.category or 'Umumiy'}\n\n"
-                f"💡 Tayyorgarlik ko'ring!"
-            )
+            return TASK_DUE_TEMPLATE.format_map(ctx)
+
+        ctx["remaining"] = self._format_time_remaining(max(0, minutes_until_due))
+        return TASK_UPCOMING_TEMPLATE.format_map(ctx)
 
     def _get_prayer_notification_message(self, prayer: str, prayer_time: str, interval: Dict, region: str) -> str:
         """Generate prayer notification message"""
-        prayer_names = {
-            "Fajr": "🌅 Bomdod",
-            "Dhuhr": "🌞 Peshin",
-            "Asr": "🌇 Asr",
-            "Maghrib": "🌆 Shom",
-            "Isha": "🌃 Xufton"
-        }
-
-        prayer_name = prayer_names.get(prayer, prayer)
-
-        return (
-            f"🕌 **NAMAZ VAQTI ESLATMASI**\n\n"
-            f"{prayer_name} namazi {interval['minutes']} daqiqadan keyin\n\n"
-            f"⏰ **Vaqt:** {prayer_time}\n"
-            f"📍 **Hudud:** {region}\n\n"
-            f"🤲 Tahorat oling va tayyorgarlik ko'ring!"
-        )
-
-    def _get_task_notification_keyboard(self, task: Task):
+        return PRAYER_TEMPLATE.format_map({
+            "prayer_name": PRAYER_NAMES.get(prayer, prayer),
+            "minutes": interval["minutes"],
+            "time": prayer_time,
+            "region": region,
+        })
+
+    def _get_task_notification_keyboard(self, task: Row):
         """Get keyboard for task notifications"""
-        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="✅ Bajarildi", callback_data=f"complete_task_{task.id}"),
-                InlineKeyboardButton(text="📋 Vazifalar", callback_data="back_to_main_tasks")
-            ]
-        ])
+        return _task_notification_keyboard(task.id)
 
     def _get_prayer_notification_keyboard(self):
         """Get keyboard for prayer notifications"""
-        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="🕌 Namaz vaqtlari", callback_data="show_prayer_times"),
-                InlineKeyboardButton(text="🔕 O'chirish", callback_data="disable_prayer_notifications")
-            ]
-        ])
+        return PRAYER_NOTIFICATION_KEYBOARD
+
+    def _mark_task_notification_sent(self, task: Row, interval: Dict):
+        """Queue the task's notification flag to be set at the end of the tick"""
+        self._pending_task_marks[interval["id"]].append(task.id)
+
+    def _record_prayer_notification(self, user_id: int, day: date, prayer: str, notification_type: str):
+        """Queue a prayer notification record for the end of the tick"""
+        self._pending_prayer_records.append({
+            "user_id": user_id,
+            "date": day,
+            "prayer_name": prayer,
+            "notification_type": notification_type
+        })
+
+    async def _flush_notification_state(self):
+        """Write everything sent this tick in one transaction"""
+        task_marks, self._pending_task_marks = self._pending_task_marks, defaultdict(list)
+        prayer_records, self._pending_prayer_records = self._pending_prayer_records, []
+        blocked_users, self._pending_blocked_users = self._pending_blocked_users, set()
+
+        if not task_marks and not prayer_records and not blocked_users:
+            return
 
-    async def _mark_task_notification_sent(self, task: Task, interval: Dict):
-        """Mark task notification as sent"""
         async with async_session_factory() as session:
-            # Update the task notification field
-            notification_field = f"notification_{interval['id']}_sent"
-            setattr(task, notification_field, True)
+            # One UPDATE per interval: the flag column differs between intervals
+            for interval_id, task_ids in task_marks.items():
+                await session.execute(
+                    update(Task)
+                    .where(Task.id.in_(task_ids))
+                    .values({f"notification_{interval_id}_sent": True})
+                )
 
-            session.add(task)
-            await session.commit()
+            if prayer_records:
+                await session.execute(
+                    sqlite_insert(PrayerNotification).on_conflict_do_nothing(),
+                    prayer_records
+                )
+
+            if blocked_users:
+                await session.execute(
+                    update(User)
+                    .where(User.id.in_(blocked_users))
+                    .values(
+                        blocked_bot=True,
+                        blocked_at=datetime.utcnow(),
+                        notifications_enabled=False,
+                        prayer_notifications_enabled=False
+                    )
+                )
 
-    async def _record_prayer_notification(self, user_id: str, date: str, prayer: str, notification_type: str):
-        """Record prayer notification in database"""
-        async with async_session_factory() as session:
-            notification = PrayerNotification(
-                user_id=user_id,
-                date=date,
-                prayer_name=prayer,
-                notification_type=notification_type
-            )
-            session.add(notification)
             await session.commit()
 
-    async def _mark_user_as_blocked(self, user_id: str):
-        """Mark user as blocked"""
-        async with async_session_factory() as session:
-            user_result = await session.execute(
-                select(User).where(User.id == user_id)
-            )
-            user = user_result.scalar_one_or_none()
-
-            if user:
-                user.blocked_bot = True
-                user.blocked_at = datetime.utcnow()
-                user.notifications_enabled = False
-                user.prayer_notifications_enabled = False
-
-                await session.commit()
-                logger.info(f"User {user_id} marked as blocked")
-
-    async def _is_user_blocked_error(self, error) -> bool:
-        """Check if error indicates user has blocked the bot"""
-        error_message = str(error).lower()
-        blocked_indicators = [
-            "bot was blocked by the user",
-            "user is deactivated",
-            "chat not found",
-            "bot is not a member"
-        ]
-        return any(indicator in error_message for indicator in blocked_indicators)
+        for user_id in blocked_users:
+            logger.info(f"User {user_id} marked as blocked")
+
+    def _mark_user_as_blocked(self, user_id: int):
+        """Queue the user to be marked as blocked at the end of the tick"""
+        self._pending_blocked_users.add(user_id)
+
+    @staticmethod
+    def _is_user_blocked_error(error: TelegramBadRequest) -> bool:
+        """Telegram reports a deleted or never-started chat as a bad request"""
+        return "chat not found" in error.message.lower()
 
     def _parse_prayer_time(self, time_str: str, base_date: datetime) -> datetime:
         """Parse prayer time string to datetime object"""
@@ -412,24 +595,16 @@ class NotificationService:
         """Get notification statistics"""
         try:
             async with async_session_factory() as session:
-                # Count users
-                total_users_result = await session.execute(select(User))
-                total_users = len(total_users_result.scalars().all())
-
-                blocked_users_result = await session.execute(
-                    select(User).where(User.blocked_bot == True)
-                )
-                blocked_users = len(blocked_users_result.scalars().all())
-
-                task_enabled_result = await session.execute(
-                    select(User).where(User.notifications_enabled == True)
-                )
-                tasks_enabled = len(task_enabled_result.scalars().all())
-
-                prayer_enabled_result = await session.execute(
-                    select(User).where(User.prayer_notifications_enabled == True)
+                # All four counts in one pass over users
+                result = await session.execute(
+                    select(
+                        func.count(),
+                        func.count().filter(User.blocked_bot == True),
+                        func.count().filter(User.notifications_enabled == True),
+                        func.count().filter(User.prayer_notifications_enabled == True),
+                    ).select_from(User)
                 )
-                prayer_enabled = len(prayer_enabled_result.scalars().all())
+                total_users, blocked_users, tasks_enabled, prayer_enabled = result.one()
 
                 return {
                     "totalUsers": total_users,
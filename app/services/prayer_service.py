@@ -1,21 +1,62 @@
 """Prayer times service using IslamAPI.uz"""
 
+import asyncio
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
 
 import httpx
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Prayer times only change once a day, an hour is plenty fresh
+CACHE_TTL = 3600
+
+# Shared by every PrayerService instance: (region, date) -> (fetched_at, prayer_times)
+_cache: Dict[Tuple[str, date], Tuple[float, Dict[str, str]]] = {}
+_locks: Dict[Tuple[str, date], asyncio.Lock] = defaultdict(asyncio.Lock)
+
+# One long-lived client for the whole process: keepalive + HTTP/2 avoid a TLS handshake per fetch
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared upstream client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=32,
+                max_connections=100,
+                keepalive_expiry=300
+            ),
+            timeout=10.0
+        )
+    return _client
+
+
+async def init_http_client():
+    """Open the shared client at startup so the first user request doesn't pay for it"""
+    get_http_client()
+
+
+async def close_http_client():
+    """Close the shared client on shutdown"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 class PrayerService:
     """Service for fetching prayer times"""
 
     def __init__(self):
         self.api_url = "https://islomapi.uz/api/present/day"
-        self.client = httpx.AsyncClient(timeout=10.0)
 
         # Supported regions in Uzbekistan (matching API regions)
         self.regions = [
@@ -26,11 +67,44 @@ class PrayerService:
 
     async def get_prayer_times(self, region: str = "Toshkent") -> Optional[Dict[str, str]]:
         """Get prayer times for a specific region"""
+        key = (region, date.today())
+
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached
+
+        # Concurrent requests for the same region wait for a single upstream fetch
+        async with _locks[key]:
+            cached = self._get_cached(key)
+            if cached is not None:
+                return cached
+
+            prayer_times = await self._fetch_prayer_times(region)
+            if prayer_times:
+                self._prune_cache(key[1])
+                _cache[key] = (time.monotonic(), prayer_times)
+            return prayer_times
+
+    def _get_cached(self, key: Tuple[str, date]) -> Optional[Dict[str, str]]:
+        """Return cached prayer times if still fresh"""
+        entry = _cache.get(key)
+        if entry and time.monotonic() - entry[0] < CACHE_TTL:
+            return entry[1]
+        return None
+
+    def _prune_cache(self, today: date):
+        """Drop entries (and their locks) left over from previous days"""
+        for key in [k for k in _cache if k[1] != today]:
+            del _cache[key]
+            _locks.pop(key, None)
+
+    async def _fetch_prayer_times(self, region: str) -> Optional[Dict[str, str]]:
+        """Fetch prayer times from the upstream API"""
         try:
             # Make API request to islomapi.uz
             params = {"region": region}
 
-            response = await self.client.get(self.api_url, params=params)
+            response = await get_http_client().get(self.api_url, params=params)
             response.raise_for_status()
 
             data = response.json()
@@ -47,7 +121,7 @@ class PrayerService:
                     "Isha": times["hufton"]
                 }
 
-                logger.debug(f"Fetched prayer times for {region}: {prayer_times}")
+                logger.debug("Fetched prayer times for %s: %s", region, prayer_times)
                 return prayer_times
 
             else:
@@ -67,6 +141,7 @@ class PrayerService:
         now = datetime.now()
         today = now.strftime("%d.%m.%Y")
         current_time = now.strftime("%H:%M")
+        current_minutes = now.hour * 60 + now.minute
 
         # Prayer names in Uzbek
         prayer_names = {
@@ -83,7 +158,7 @@ class PrayerService:
         message += f"🕐 **Hozir:** {current_time}\n\n"
 
         # Find next prayer
-        next_prayer = self._find_next_prayer(prayer_times, current_time)
+        next_prayer = self._find_next_prayer(prayer_times, current_minutes)
 
         for prayer, time in prayer_times.items():
             prayer_name = prayer_names.get(prayer, prayer)
@@ -96,7 +171,7 @@ class PrayerService:
 
         if next_prayer:
             next_time = prayer_times[next_prayer]
-            time_until = self._calculate_time_until(current_time, next_time)
+            time_until = self._calculate_time_until(current_minutes, next_time)
             next_name = prayer_names.get(next_prayer, next_prayer)
 
             message += f"\n⏰ **Keyingi namaz:** {next_name}\n"
@@ -106,11 +181,9 @@ class PrayerService:
 
         return message
 
-    def _find_next_prayer(self, prayer_times: Dict[str, str], current_time: str) -> Optional[str]:
+    def _find_next_prayer(self, prayer_times: Dict[str, str], current_minutes: int) -> Optional[str]:
         """Find the next upcoming prayer"""
         try:
-            current_minutes = self._time_to_minutes(current_time)
-
             for prayer, time in prayer_times.items():
                 prayer_minutes = self._time_to_minutes(time)
 
@@ -123,10 +196,9 @@ class PrayerService:
         except Exception:
             return None
 
-    def _calculate_time_until(self, current_time: str, prayer_time: str) -> str:
+    def _calculate_time_until(self, current_minutes: int, prayer_time: str) -> str:
         """Calculate time remaining until prayer"""
         try:
-            current_minutes = self._time_to_minutes(current_time)
             prayer_minutes = self._time_to_minutes(prayer_time)
 
             if prayer_minutes <= current_minutes:
@@ -135,8 +207,7 @@ class PrayerService:
 
             diff_minutes = prayer_minutes - current_minutes
 
-            hours = diff_minutes // 60
-            minutes = diff_minutes % 60
+            hours, minutes = divmod(diff_minutes, 60)
 
             if hours > 0:
                 return f"{hours} soat {minutes} daqiqa"
@@ -148,22 +219,12 @@ class PrayerService:
 
     def _time_to_minutes(self, time_str: str) -> int:
         """Convert time string to minutes since midnight"""
+        hours, sep, minutes = time_str.partition(':')
         try:
-            hours, minutes = map(int, time_str.split(':'))
-            return hours * 60 + minutes
-        except:
+            return int(hours) * 60 + int(minutes)
+        except ValueError:
             return 0
 
     def get_regions(self) -> List[str]:
         """Get list of supported regions"""
-        return self.regions.copy()
-
-    async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
-
-    async def __aenter__(self):
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close()
\ No newline at end of file
+        return self.regions.copy()
\ No newline at end of file
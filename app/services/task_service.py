@@ -1,6 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 from app.database import Task, User, async_session_factory
 from typing import List, Optional
 from datetime import datetime
@@ -28,7 +28,6 @@ class TaskService:
             )
             session.add(task)
             await session.commit()
-            await session.refresh(task)
             return task
 
     async def get_user_tasks(
@@ -38,9 +37,9 @@ class TaskService:
     ) -> List[Task]:
         async with async_session_factory() as session:
             query = select(Task).options(
-                joinedload(Task.assignee),
-                joinedload(Task.creator),
-                joinedload(Task.team)
+                selectinload(Task.assignee),
+                selectinload(Task.creator),
+                selectinload(Task.team)
             ).where(Task.assigned_to == user_id)
 
             if status:
@@ -56,9 +55,9 @@ class TaskService:
     ) -> List[Task]:
         async with async_session_factory() as session:
             query = select(Task).options(
-                joinedload(Task.assignee),
-                joinedload(Task.creator),
-                joinedload(Task.team)
+                selectinload(Task.assignee),
+                selectinload(Task.creator),
+                selectinload(Task.team)
             ).where(Task.team_id == team_id)
 
             if status:
@@ -90,7 +89,6 @@ class TaskService:
                     task.completed_at = datetime.utcnow()
 
                 await session.commit()
-                await session.refresh(task)
 
             return task
 
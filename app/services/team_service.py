@@ -1,131 +1,166 @@
 """Team management service"""
 
 import logging
-import random
+import secrets
 import string
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import select, and_, func
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy import select, and_, or_, bindparam, case, exists, func, lambda_stmt, literal, update
+from sqlalchemy.exc import IntegrityError
 from app.database import async_session_factory, Team, TeamMember, User, Task
+from app.utils.formatters import create_header, create_section
+from app.utils.keyboards import KeyboardBuilder
 
 logger = logging.getLogger(__name__)
 
+TEAM_ID_ALPHABET = string.ascii_uppercase + string.digits
+TEAM_ID_LENGTH = 6
+
+# Team ID clashes are retried this many times before giving up
+TEAM_ID_ATTEMPTS = 3
+
+# Hot point lookups as lambda statements: the statement is built and its SQL compiled once,
+# later calls only bind new parameters
+TEAM_BY_ID = lambda_stmt(lambda: select(Team).where(Team.id == bindparam("team_id")))
+TEAMS_BY_MEMBER = lambda_stmt(
+    lambda: select(Team, TeamMember.is_admin)
+    .join(TeamMember, TeamMember.team_id == Team.id)
+    .where(TeamMember.user_id == bindparam("user_id"))
+)
+IS_TEAM_MEMBER = lambda_stmt(
+    lambda: select(literal(1)).where(
+        and_(
+            TeamMember.team_id == bindparam("team_id"),
+            TeamMember.user_id == bindparam("user_id")
+        )
+    ).limit(1)
+)
+IS_TEAM_ADMIN = lambda_stmt(
+    lambda: select(
+        exists().where(
+            and_(
+                Team.id == bindparam("team_id"),
+                Team.admin_id == bindparam("user_id")
+            )
+        )
+    )
+)
+
 
 class TeamService:
     """Service for team management"""
 
     def __init__(self):
-        pass
+        self.keyboard_builder = KeyboardBuilder()
 
     def _generate_team_id(self) -> str:
         """Generate unique 6-character team ID"""
-        chars = string.ascii_uppercase + string.digits
-        return ''.join(random.choices(chars, k=6))
+        # OS randomness: team IDs double as join codes, so they shouldn't be guessable
+        return ''.join(secrets.choice(TEAM_ID_ALPHABET) for _ in range(TEAM_ID_LENGTH))
 
-    async def create_team(self, team_name: str, admin_id: str) -> Team:
+    async def create_team(self, team_name: str, admin_id: int) -> Team:
         """Create a new team"""
         async with async_session_factory() as session:
-            # Generate unique team ID
-            team_id = self._generate_team_id()
-
-            # Ensure uniqueness
-            while True:
-                existing = await session.execute(
-                    select(Team).where(Team.id == team_id)
-                )
-                if not existing.scalar_one_or_none():
-                    break
+            # 36^6 IDs make a clash rare enough to just insert and retry on the primary key
+            for attempt in range(1, TEAM_ID_ATTEMPTS + 1):
                 team_id = self._generate_team_id()
 
-            # Create team
-            team = Team(
-                id=team_id,
-                name=team_name,
-                admin_id=admin_id
-            )
-            session.add(team)
+                # Create team
+                team = Team(
+                    id=team_id,
+                    name=team_name,
+                    admin_id=admin_id,
+                    total_members=1
+                )
+                session.add(team)
 
-            # Add admin as member
-            member = TeamMember(
-                team_id=team_id,
-                user_id=admin_id,
-                is_admin=True
-            )
-            session.add(member)
+                # Add admin as member
+                member = TeamMember(
+                    team_id=team_id,
+                    user_id=admin_id,
+                    is_admin=True
+                )
+                session.add(member)
 
-            await session.commit()
-            await session.refresh(team)
+                try:
+                    await session.commit()
+                    break
+                except IntegrityError:
+                    await session.rollback()
+                    if attempt == TEAM_ID_ATTEMPTS:
+                        raise
+                    logger.warning(f"Team ID {team_id} already taken, retrying")
 
             logger.info(f"Team created: {team_name} ({team_id}) by user {admin_id}")
             return team
 
-    async def join_team(self, team_id: str, user_id: str) -> Team:
-        """Join a team by ID"""
+    async def join_team_with_stats(self, team_id: str, user_id: int) -> Tuple[Team, Dict]:
+        """Join a team and return it with its member and task counts, in one transaction"""
         async with async_session_factory() as session:
-            # Check if team exists
-            team_result = await session.execute(
-                select(Team).where(Team.id == team_id)
-            )
-            team = team_result.scalar_one_or_none()
+            # Team and existing membership in one query
+            row = (await session.execute(
+                select(Team, self._membership_exists(team_id, user_id)).where(Team.id == team_id)
+            )).first()
 
-            if not team:
+            if row is None:
                 raise ValueError("Team not found")
 
-            # Check if user is already a member
-            existing_result = await session.execute(
-                select(TeamMember).where(
-                    and_(
-                        TeamMember.team_id == team_id,
-                        TeamMember.user_id == user_id
-                    )
-                )
-            )
-            existing = existing_result.scalar_one_or_none()
-
-            if existing:
+            team, already_member = row
+            if already_member:
                 raise ValueError("User already in team")
 
             # Add user as member
-            member = TeamMember(
+            session.add(TeamMember(
                 team_id=team_id,
                 user_id=user_id,
                 is_admin=False
-            )
-            session.add(member)
+            ))
+
+            # Bump the member counter and read both counters back in one statement
+            total_members, total_tasks = (await session.execute(
+                update(Team)
+                .where(Team.id == team_id)
+                .values(total_members=Team.total_members + 1)
+                .returning(Team.total_members, Team.total_tasks)
+            )).one()
 
             await session.commit()
 
             logger.info(f"User {user_id} joined team {team_id}")
-            return team
+            return team, {"total_members": total_members, "total_tasks": total_tasks}
 
-    async def leave_team(self, team_id: str, user_id: str) -> Optional[Team]:
+    async def leave_team(self, team_id: str, user_id: int) -> Optional[Team]:
         """Leave a team"""
         async with async_session_factory() as session:
-            # Get team and member
-            team_result = await session.execute(
-                select(Team).where(Team.id == team_id)
-            )
-            team = team_result.scalar_one_or_none()
-
-            if not team:
-                raise ValueError("Team not found")
-
-            member_result = await session.execute(
-                select(TeamMember).where(
+            # Team and the user's membership row in one query
+            row = (await session.execute(
+                select(Team, TeamMember)
+                .outerjoin(
+                    TeamMember,
                     and_(
-                        TeamMember.team_id == team_id,
+                        TeamMember.team_id == Team.id,
                         TeamMember.user_id == user_id
                     )
                 )
-            )
-            member = member_result.scalar_one_or_none()
+                .where(Team.id == team_id)
+            )).first()
 
-            if not member:
+            if row is None:
+                raise ValueError("Team not found")
+
+            team, member = row
+            if member is None:
                 raise ValueError("User not in team")
 
             # Remove member
             await session.delete(member)
+            await session.execute(
+                update(Team)
+                .where(Team.id == team_id)
+                .values(total_members=Team.total_members - 1)
+            )
 
             # If admin is leaving, transfer admin to another member
             if team.admin_id == user_id:
@@ -137,7 +172,7 @@ class TeamService:
                         )
                     )
                 )
-                other_member = other_members.first()
+                other_member = other_members.scalars().first()
 
                 if other_member:
                     team.admin_id = other_member.user_id
@@ -157,82 +192,57 @@ class TeamService:
     async def get_team(self, team_id: str) -> Optional[Team]:
         """Get team by ID"""
         async with async_session_factory() as session:
-            result = await session.execute(
-                select(Team).where(Team.id == team_id)
-            )
+            result = await session.execute(TEAM_BY_ID, {"team_id": team_id})
             return result.scalar_one_or_none()
 
-    async def get_user_teams(self, user_id: str) -> List[Team]:
-        """Get all teams for a user"""
+    async def get_user_teams(self, user_id: int) -> List[Tuple[Team, bool]]:
+        """Get all teams for a user, each with whether the user is its admin"""
         async with async_session_factory() as session:
-            result = await session.execute(
-                select(Team).join(TeamMember).where(TeamMember.user_id == user_id)
+            result = await session.execute(TEAMS_BY_MEMBER, {"user_id": user_id})
+            return [(team, bool(is_admin)) for team, is_admin in result.all()]
+
+    @staticmethod
+    def _membership_exists(team_id: str, user_id: int):
+        """EXISTS clause for the user's membership, to fetch alongside another row"""
+        return exists().where(
+            and_(
+                TeamMember.team_id == team_id,
+                TeamMember.user_id == user_id
             )
-            return result.scalars().all()
+        )
 
-    async def is_user_in_team(self, user_id: str, team_id: str) -> bool:
+    async def is_user_in_team(self, user_id: int, team_id: str) -> bool:
         """Check if user is in team"""
         async with async_session_factory() as session:
-            result = await session.execute(
-                select(TeamMember).where(
-                    and_(
-                        TeamMember.team_id == team_id,
-                        TeamMember.user_id == user_id
-                    )
-                )
-            )
-            return result.scalar_one_or_none() is not None
+            # A single constant back instead of the membership row
+            found = await session.scalar(IS_TEAM_MEMBER, {"team_id": team_id, "user_id": user_id})
+            return found is not None
 
-    async def is_team_admin(self, user_id: str, team_id: str) -> bool:
+    async def is_team_admin(self, user_id: int, team_id: str) -> bool:
         """Check if user is team admin"""
         async with async_session_factory() as session:
-            result = await session.execute(
-                select(Team).where(
-                    and_(
-                        Team.id == team_id,
-                        Team.admin_id == user_id
-                    )
-                )
-            )
-            return result.scalar_one_or_none() is not None
+            # Existence only, no need to load the team row
+            return await session.scalar(IS_TEAM_ADMIN, {"team_id": team_id, "user_id": user_id})
 
     async def get_team_stats(self, team_id: str) -> Dict:
         """Get team statistics"""
         async with async_session_factory() as session:
-            # Count members
-            members_result = await session.execute(
-                select(func.count(TeamMember.id)).where(TeamMember.team_id == team_id)
-            )
-            total_members = members_result.scalar() or 0
-
-            # Count tasks
-            tasks_result = await session.execute(
-                select(func.count(Task.id)).where(Task.team_id == team_id)
-            )
-            total_tasks = tasks_result.scalar() or 0
-
-            # Count completed tasks
-            completed_result = await session.execute(
-                select(func.count(Task.id)).where(
-                    and_(
-                        Task.team_id == team_id,
-                        Task.completed == True
-                    )
-                )
-            )
-            completed_tasks = completed_result.scalar() or 0
-
-            # Count overdue tasks
-            overdue_result = await session.execute(
-                select(func.count(Task.id)).where(
-                    and_(
-                        Task.team_id == team_id,
-                        Task.completed == False,
-                        Task.due_date < datetime.utcnow()
-                    )
-                )
-            )
-            overdue_tasks = overdue_result.scalar() or 0
+            # Counters live on the team row; only the overdue count depends on the clock
+            row = (await session.execute(
+                select(
+                    Team.total_members,
+                    Team.total_tasks,
+                    Team.completed_tasks,
+                    select(func.count(Task.id)).where(
+                        and_(
+                            Task.team_id == team_id,
+                            Task.completed == False,
+                            Task.due_date < datetime.utcnow()
+                        )
+                    ).scalar_subquery()
+                ).where(Team.id == team_id)
+            )).first()
+            total_members, total_tasks, completed_tasks, overdue_tasks = row or (0, 0, 0, 0)
 
             active_tasks = total_tasks - completed_tasks
             completion_rate = int((completed_tasks / total_tasks) * 100) if total_tasks > 0 else 0
@@ -246,25 +256,58 @@ class TeamService:
                 "completion_rate": completion_rate
             }
 
-    async def assign_task_to_team(self, task_id: int, team_id: str, assigned_by: str):
+    async def render_team_list(self, user_teams: List[Tuple[Team, bool]]) -> Tuple[str, InlineKeyboardMarkup]:
+        """Render the team selection list shown when a user belongs to several teams"""
+        teams = [team for team, _ in user_teams]
+
+        lines = [f"👥 **SIZNING JAMOALARINGIZ ({len(user_teams)})**\n\n"]
+        for i, (team, is_admin) in enumerate(user_teams, 1):
+            role = "👑" if is_admin else "👤"
+            lines.append(f"{i}. {role} **{team.name}**\n")
+            lines.append(f"   🆔 `{team.id}` | 👥 {team.total_members} a'zo\n\n")
+
+        return "".join(lines), self.keyboard_builder.multiple_teams_menu(teams)
+
+    async def assign_task_to_team(self, task_id: int, team_id: str, assigned_by: int):
         """Assign a personal task to team"""
         async with async_session_factory() as session:
-            # Get the task
-            task_result = await session.execute(
-                select(Task).where(Task.id == task_id)
-            )
-            task = task_result.scalar_one_or_none()
+            # Task and the assigner's membership in one query
+            row = (await session.execute(
+                select(Task, self._membership_exists(team_id, assigned_by)).where(Task.id == task_id)
+            )).first()
 
-            if not task:
+            if row is None:
                 raise ValueError("Task not found")
 
+            task, is_member = row
+
             if task.user_id != assigned_by:
                 raise ValueError("Can only assign your own tasks")
 
-            # Check if team exists and user is member
-            if not await self.is_user_in_team(assigned_by, team_id):
+            if not is_member:
                 raise ValueError("User not in team")
 
+            # Move the task's weight from its old team's counters (if any) to the new team's
+            if task.team_id != team_id:
+                completed = 1 if task.completed else 0
+                if task.team_id:
+                    await session.execute(
+                        update(Team)
+                        .where(Team.id == task.team_id)
+                        .values(
+                            total_tasks=Team.total_tasks - 1,
+                            completed_tasks=Team.completed_tasks - completed
+                        )
+                    )
+                await session.execute(
+                    update(Team)
+                    .where(Team.id == team_id)
+                    .values(
+                        total_tasks=Team.total_tasks + 1,
+                        completed_tasks=Team.completed_tasks + completed
+                    )
+                )
+
             # Assign to team
             task.team_id = team_id
             task.assigned_by = assigned_by
@@ -272,75 +315,93 @@ class TeamService:
             await session.commit()
             logger.info(f"Task {task_id} assigned to team {team_id} by user {assigned_by}")
 
-    async def complete_team_task(self, team_id: str, task_id: int, completed_by: str, note: str = ""):
+    async def complete_team_task(self, team_id: str, task_id: int, completed_by: int, note: str = ""):
         """Complete a team task"""
         async with async_session_factory() as session:
-            # Get the task
-            task_result = await session.execute(
-                select(Task).where(
+            # Task state and the completer's membership in one query
+            row = (await session.execute(
+                select(Task.completed, self._membership_exists(team_id, completed_by)).where(
                     and_(
                         Task.id == task_id,
                         Task.team_id == team_id
                     )
                 )
-            )
-            task = task_result.scalar_one_or_none()
+            )).first()
 
-            if not task:
+            if row is None:
                 raise ValueError("Task not found")
 
-            if task.completed:
+            already_completed, is_member = row
+
+            if already_completed:
                 raise ValueError("Task already completed")
 
-            # Check if user is team member
-            if not await self.is_user_in_team(completed_by, team_id):
+            if not is_member:
                 raise ValueError("User not in team")
 
-            # Complete task
-            task.completed = True
-            task.completed_at = datetime.utcnow()
-            task.completed_by = completed_by
+            values = {
+                "completed": True,
+                "completed_at": datetime.utcnow(),
+                "completed_by": completed_by
+            }
             if note:
-                task.notes = f"{task.notes}\n\nCompletion note: {note}" if task.notes else f"Completion note: {note}"
+                values["notes"] = case(
+                    (or_(Task.notes.is_(None), Task.notes == ""), f"Completion note: {note}"),
+                    else_=Task.notes + f"\n\nCompletion note: {note}"
+                )
+
+            # Only matches a still-open task, so concurrent completions bump the counter once
+            completed = (await session.execute(
+                update(Task)
+                .where(and_(Task.id == task_id, Task.team_id == team_id, Task.completed.is_(False)))
+                .values(**values)
+                .returning(Task.id)
+            )).first()
+
+            if completed is None:
+                raise ValueError("Task already completed")
+
+            await session.execute(
+                update(Team)
+                .where(Team.id == team_id)
+                .values(completed_tasks=Team.completed_tasks + 1)
+            )
 
             await session.commit()
             logger.info(f"Team task {task_id} completed by user {completed_by}")
 
     async def get_team_members_info(self, team_id: str) -> List[Dict]:
         """Get detailed team member information"""
+        # Per-member task counts grouped once, instead of two COUNT queries per member
+        assigned_sq = (
+            select(Task.assigned_by.label("user_id"), func.count(Task.id).label("count"))
+            .where(Task.team_id == team_id)
+            .group_by(Task.assigned_by)
+            .subquery()
+        )
+        completed_sq = (
+            select(Task.completed_by.label("user_id"), func.count(Task.id).label("count"))
+            .where(Task.team_id == team_id)
+            .group_by(Task.completed_by)
+            .subquery()
+        )
+
         async with async_session_factory() as session:
-            # Get team members with user info
             result = await session.execute(
-                select(TeamMember, User).join(User, TeamMember.user_id == User.id).where(TeamMember.team_id == team_id)
-            )
-            members_data = result.all()
-
-            members_info = []
-
-            for member, user in members_data:
-                # Count tasks assigned by this member
-                assigned_result = await session.execute(
-                    select(func.count(Task.id)).where(
-                        and_(
-                            Task.team_id == team_id,
-                            Task.assigned_by == user.id
-                        )
-                    )
+                select(
+                    TeamMember,
+                    User,
+                    func.coalesce(assigned_sq.c.count, 0),
+                    func.coalesce(completed_sq.c.count, 0)
                 )
-                tasks_assigned = assigned_result.scalar() or 0
-
-                # Count tasks completed by this member
-                completed_result = await session.execute(
-                    select(func.count(Task.id)).where(
-                        and_(
-                            Task.team_id == team_id,
-                            Task.completed_by == user.id
-                        )
-                    )
-                )
-                tasks_completed = completed_result.scalar() or 0
+                .join(User, TeamMember.user_id == User.id)
+                .outerjoin(assigned_sq, assigned_sq.c.user_id == User.id)
+                .outerjoin(completed_sq, completed_sq.c.user_id == User.id)
+                .where(TeamMember.team_id == team_id)
+            )
 
-                members_info.append({
+            return [
+                {
                     "id": user.id,
                     "name": user.full_name,
                     "username": user.username,
@@ -348,14 +409,12 @@ class TeamService:
                     "joined_at": member.joined_at,
                     "tasks_assigned": tasks_assigned,
                     "tasks_completed": tasks_completed
-                })
-
-            return members_info
+                }
+                for member, user, tasks_assigned, tasks_completed in result.all()
+            ]
 
     def format_team_info(self, team: Team, stats: Dict, user_role: str = "member") -> str:
         """Format team information for display"""
-        from app.utils.formatters import ModernUI
-
         role_emoji = "👑" if user_role == "admin" else "👤"
 
         header = f"👥 {role_emoji} **{team.name}**"
@@ -372,4 +431,4 @@ class TeamService:
             f"📅 **Yaratilgan:** {team.created_at.strftime('%d.%m.%Y')}"
         )
 
-        return ModernUI.create_header(header, subheader) + "\n" + ModernUI.create_section("📊 MA'LUMOTLAR", info_text)
\ No newline at end of file
+        return create_header(header, subheader) + "\n" + create_section("📊 MA'LUMOTLAR", info_text)
\ No newline at end of file
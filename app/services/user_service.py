@@ -1,9 +1,57 @@
+import asyncio
+import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
 from app.database import User, async_session_factory
-from typing import Optional
+from app.utils.ttl_cache import TTLCache
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Every update looks its sender up; keep recently seen users in memory for a minute
+USER_CACHE_TTL = 60
+USER_CACHE_MAX_SIZE = 10_000
+
+_user_cache = TTLCache(USER_CACHE_TTL, USER_CACHE_MAX_SIZE)
+
 
 class UserService:
+    def __init__(self):
+        # telegram_id -> in-flight background write
+        self._pending_writes: Dict[int, asyncio.Task] = {}
+
+    def schedule_create_or_update_user(
+        self,
+        telegram_id: int,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        language_code: Optional[str] = "en"
+    ) -> asyncio.Task:
+        """Upsert the user in the background, coalescing writes for the same user"""
+        pending = self._pending_writes.get(telegram_id)
+        if pending and not pending.done():
+            return pending
+
+        task = asyncio.create_task(self._create_or_update_user_safe(
+            telegram_id, username, first_name, last_name, language_code
+        ))
+        self._pending_writes[telegram_id] = task
+        task.add_done_callback(lambda t: self._forget_pending_write(telegram_id, t))
+        return task
+
+    def _forget_pending_write(self, telegram_id: int, task: asyncio.Task):
+        if self._pending_writes.get(telegram_id) is task:
+            del self._pending_writes[telegram_id]
+
+    async def _create_or_update_user_safe(self, *args) -> Optional[User]:
+        try:
+            return await self.create_or_update_user(*args)
+        except Exception as e:
+            logger.error(f"Failed to save user {args[0]}: {e}")
+            return None
+
     async def create_or_update_user(
         self,
         telegram_id: int,
@@ -12,37 +60,40 @@ class UserService:
         last_name: Optional[str] = None,
         language_code: Optional[str] = "en"
     ) -> User:
+        profile = {
+            "username": username,
+            "first_name": first_name,
+            "last_name": last_name,
+            "language_code": language_code
+        }
+
         async with async_session_factory() as session:
-            result = await session.execute(
-                select(User).where(User.telegram_id == telegram_id)
+            # One round-trip for new and returning users alike
+            user = await session.scalar(
+                insert(User)
+                .values(telegram_id=telegram_id, **profile)
+                .on_conflict_do_update(index_elements=[User.telegram_id], set_=profile)
+                .returning(User)
             )
-            user = result.scalar_one_or_none()
+            await session.commit()
 
-            if user:
-                user.username = username
-                user.first_name = first_name
-                user.last_name = last_name
-                user.language_code = language_code
-            else:
-                user = User(
-                    telegram_id=telegram_id,
-                    username=username,
-                    first_name=first_name,
-                    last_name=last_name,
-                    language_code=language_code
-                )
-                session.add(user)
+        _user_cache.set(telegram_id, user)
+        return user
 
-            await session.commit()
-            await session.refresh(user)
+    async def get_user_by_telegram_id(self, telegram_id: int) -> Optional[User]:
+        user = _user_cache.get(telegram_id)
+        if user is not None:
             return user
 
-    async def get_user_by_telegram_id(self, telegram_id: int) -> Optional[User]:
         async with async_session_factory() as session:
             result = await session.execute(
                 select(User).where(User.telegram_id == telegram_id)
             )
-            return result.scalar_one_or_none()
+            user = result.scalar_one_or_none()
+
+        if user is not None:
+            _user_cache.set(telegram_id, user)
+        return user
 
     async def update_user_location(
         self,
@@ -64,8 +115,9 @@ class UserService:
             user.timezone = timezone
 
             await session.commit()
-            await session.refresh(user)
-            return user
+
+        _user_cache.pop(telegram_id)
+        return user
 
     async def update_notification_settings(
         self,
@@ -83,5 +135,6 @@ class UserService:
             user.notification_offset = notification_offset
 
             await session.commit()
-            await session.refresh(user)
-            return user
\ No newline at end of file
+
+        _user_cache.pop(telegram_id)
+        return user
\ No newline at end of file
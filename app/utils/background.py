@@ -0,0 +1,34 @@
+"""Fire-and-forget tasks that run after a handler has replied"""
+
+import asyncio
+import logging
+from typing import Awaitable, Set
+
+logger = logging.getLogger(__name__)
+
+# Strong references so background work isn't garbage collected mid-flight
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def run_in_background(coro: Awaitable, description: str = "Background task"):
+    """Schedule work off the request path, logging failures"""
+    async def runner():
+        try:
+            await coro
+        except Exception as e:
+            logger.error(f"{description} failed: {e}")
+
+    task = asyncio.create_task(runner())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def wait_for_background_tasks(timeout: float = 10.0):
+    """Give outstanding background work a chance to finish on shutdown"""
+    if not _background_tasks:
+        return
+
+    logger.info(f"Waiting for {len(_background_tasks)} background task(s) to finish")
+    _, pending = await asyncio.wait(set(_background_tasks), timeout=timeout)
+    for task in pending:
+        task.cancel()
@@ -0,0 +1,13 @@
+"""Typed callback data for inline buttons that carry a value"""
+
+from aiogram.filters.callback_data import CallbackData
+
+
+class TaskCB(CallbackData, prefix="ct"):
+    """Complete task button"""
+    task_id: int
+
+
+class RegionCB(CallbackData, prefix="sr"):
+    """Prayer region selection button"""
+    region: str
@@ -1,59 +1,109 @@
 """Message formatting utilities"""
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+PRIORITY_EMOJI = {
+    "high": "🔴",
+    "medium": "🟡",
+    "low": "🟢"
+}
+
+CATEGORY_EMOJI = {
+    "work": "💼",
+    "personal": "👤",
+    "study": "📚",
+    "health": "🏥",
+    "shopping": "🛒",
+    "family": "👨‍👩‍👧‍👦",
+    "finance": "💰",
+    "travel": "✈️",
+    "hobby": "🎨"
+}
+
+# length -> every possible bar of that length, indexed by filled segments
+_PROGRESS_BARS: Dict[int, List[str]] = {}
+
+
+def _progress_bars(length: int) -> List[str]:
+    """All length + 1 bars for a given length, built on first use"""
+    bars = _PROGRESS_BARS.get(length)
+    if bars is None:
+        bars = _PROGRESS_BARS[length] = ["▰" * i + "▱" * (length - i) for i in range(length + 1)]
+    return bars
+
+
+HEADER_LINE = "=" * 30
+SECTION_LINE = "-" * 20
+
+
+# The hottest helpers live at module level so callers skip the class attribute lookup;
+# ModernUI keeps them as static methods for existing call sites
+def create_header(title: str, subtitle: str = "") -> str:
+    """Create formatted header"""
+    if subtitle:
+        return f"{HEADER_LINE}\n{title}\n{subtitle}\n{HEADER_LINE}"
+    return f"{HEADER_LINE}\n{title}\n{HEADER_LINE}"
+
+
+def create_section(title: str, content: str) -> str:
+    """Create formatted section"""
+    return f"\n📋 **{title}**\n{SECTION_LINE}\n{content}\n"
+
+
+def emoji_for_priority(priority: str) -> str:
+    """Get emoji for task priority"""
+    return PRIORITY_EMOJI.get(priority, "⚪")
+
+
+def format_date(date: datetime) -> str:
+    """Format date in Uzbek locale"""
+    if not date:
+        return "Noma'lum"
+
+    return date.strftime("%d.%m.%Y %H:%M")
+
 
 class ModernUI:
     """Modern UI formatting utilities"""
 
-    @staticmethod
-    def create_header(title: str, subtitle: str = "") -> str:
-        """Create formatted header"""
-        header = f"{'=' * 30}\n{title}\n"
-        if subtitle:
-            header += f"{subtitle}\n"
-        header += "=" * 30
-        return header
-
-    @staticmethod
-    def create_section(title: str, content: str) -> str:
-        """Create formatted section"""
-        return f"\n📋 **{title}**\n{'-' * 20}\n{content}\n"
+    create_header = staticmethod(create_header)
+    create_section = staticmethod(create_section)
+    emoji_for_priority = staticmethod(emoji_for_priority)
+    format_date = staticmethod(format_date)
 
     @staticmethod
     def create_progress_bar(completed: int, total: int, length: int = 10) -> str:
         """Create ASCII progress bar"""
+        bars = _progress_bars(length)
         if total == 0:
-            return "▱" * length + " 0%"
+            return f"{bars[0]} 0%"
 
-        percentage = (completed / total) * 100
-        filled = int((completed / total) * length)
-        bar = "▰" * filled + "▱" * (length - filled)
-
-        return f"{bar} {percentage:.1f}%"
+        filled = min(completed * length // total, length)
+        return f"{bars[filled]} {completed * 100 / total:.1f}%"
 
     @staticmethod
     def create_team_info(team: Any, stats: Dict, user_role: str = "member") -> str:
         """Create team information display"""
         role_emoji = "👑" if user_role == "admin" else "👤"
 
-        text = f"👥 {role_emoji} **{team.name}**\n"
-        text += f"*Team ID: {team.id}*\n\n"
-
-        text += "📊 **STATISTIKA:**\n"
-        text += f"🆔 Kod: `{team.id}`\n"
-        text += f"👥 A'zolar: {stats.get('total_members', 0)} kishi\n"
-        text += f"📝 Vazifalar: {stats.get('total_tasks', 0)} ta\n"
-        text += f"✅ Bajarilgan: {stats.get('completed_tasks', 0)} ta\n"
-        text += f"⏳ Faol: {stats.get('active_tasks', 0)} ta\n"
-        text += f"⚠️ Muddati o'tgan: {stats.get('overdue_tasks', 0)} ta\n"
-        text += f"📈 Bajarish darajasi: {stats.get('completion_rate', 0)}%\n"
+        parts = [
+            f"👥 {role_emoji} **{team.name}**\n"
+            f"*Team ID: {team.id}*\n\n"
+            "📊 **STATISTIKA:**\n"
+            f"🆔 Kod: `{team.id}`\n"
+            f"👥 A'zolar: {stats.get('total_members', 0)} kishi\n"
+            f"📝 Vazifalar: {stats.get('total_tasks', 0)} ta\n"
+            f"✅ Bajarilgan: {stats.get('completed_tasks', 0)} ta\n"
+            f"⏳ Faol: {stats.get('active_tasks', 0)} ta\n"
+            f"⚠️ Muddati o'tgan: {stats.get('overdue_tasks', 0)} ta\n"
+            f"📈 Bajarish darajasi: {stats.get('completion_rate', 0)}%\n"
+        ]
 
         if hasattr(team, 'created_at'):
-            text += f"📅 Yaratilgan: {team.created_at.strftime('%d.%m.%Y')}\n"
+            parts.append(f"📅 Yaratilgan: {team.created_at.strftime('%d.%m.%Y')}\n")
 
-        return text
+        return "".join(parts)
 
     @staticmethod
     def format_task_list(tasks: list, max_tasks: int = 5) -> str:
@@ -61,92 +111,79 @@ class ModernUI:
         if not tasks:
             return "📝 Hozircha vazifalar yo'q"
 
-        text = ""
-        displayed = 0
-
-        for task in tasks:
-            if displayed >= max_tasks:
-                break
-
-            if task.completed:
-                continue
+        # One pass to drop completed tasks; everything below works on what's left
+        pending = [task for task in tasks if not task.completed]
+        shown = pending[:max_tasks]
+        remaining = len(pending) - len(shown)
 
-            # Priority emoji
-            priority_emoji = {
-                "high": "🔴",
-                "medium": "🟡",
-                "low": "🟢"
-            }.get(task.priority, "⚪")
+        parts = []
+        for task in shown:
+            priority_emoji = PRIORITY_EMOJI.get(task.priority, "⚪")
 
             # Due date
-            if hasattr(task, 'due_date') and task.due_date:
+            if task.due_date:
                 due_date = task.due_date.strftime("%d.%m %H:%M")
             else:
                 due_date = "Muddatsiz"
 
-            text += f"{priority_emoji} **{task.name}**\n"
-            text += f"   📅 {due_date}"
+            parts.append(f"{priority_emoji} **{task.name}**\n   📅 {due_date}")
 
-            if hasattr(task, 'category') and task.category:
-                text += f" | 📁 {task.category}"
+            if task.category:
+                parts.append(f" | 📁 {task.category}")
 
-            text += "\n\n"
-            displayed += 1
+            parts.append("\n\n")
 
-        if len([t for t in tasks if not t.completed]) > max_tasks:
-            remaining = len([t for t in tasks if not t.completed]) - max_tasks
-            text += f"... va yana {remaining} ta vazifa\n"
+        if remaining > 0:
+            parts.append(f"... va yana {remaining} ta vazifa\n")
 
-        return text.strip()
+        return "".join(parts).strip()
 
     @staticmethod
     def format_user_stats(user: Any, tasks: list) -> str:
         """Format user statistics"""
+        now = datetime.utcnow()
         total = len(tasks)
-        completed = len([t for t in tasks if t.completed])
+        completed = overdue = 0
+
+        # Single pass for both counts
+        for task in tasks:
+            if task.completed:
+                completed += 1
+            elif task.due_date and task.due_date < now:
+                overdue += 1
+
         active = total - completed
-        overdue = len([t for t in tasks if not t.completed and
-                      hasattr(t, 'due_date') and t.due_date and
-                      t.due_date < datetime.utcnow()])
 
         progress_bar = ModernUI.create_progress_bar(completed, total)
 
-        text = f"👤 **{getattr(user, 'first_name', 'User')}**\n"
-        text += "*Shaxsiy profil*\n\n"
-
-        text += "📊 **STATISTIKA:**\n"
-        text += f"📝 Jami: {total} ta vazifa\n"
-        text += f"✅ Bajarilgan: {completed} ta\n"
-        text += f"⏳ Faol: {active} ta\n"
-        text += f"⚠️ Muddati o'tgan: {overdue} ta\n"
-        text += f"📈 Bajarish darajasi: {progress_bar}\n"
+        parts = [
+            f"👤 **{getattr(user, 'first_name', 'User')}**\n"
+            "*Shaxsiy profil*\n\n"
+            "📊 **STATISTIKA:**\n"
+            f"📝 Jami: {total} ta vazifa\n"
+            f"✅ Bajarilgan: {completed} ta\n"
+            f"⏳ Faol: {active} ta\n"
+            f"⚠️ Muddati o'tgan: {overdue} ta\n"
+            f"📈 Bajarish darajasi: {progress_bar}\n"
+        ]
 
         if hasattr(user, 'registration_date'):
-            text += f"📅 Ro'yxatdan o'tgan: {user.registration_date.strftime('%d.%m.%Y')}\n"
+            parts.append(f"📅 Ro'yxatdan o'tgan: {user.registration_date.strftime('%d.%m.%Y')}\n")
 
-        return text
+        return "".join(parts)
 
     @staticmethod
-    def format_date(date: datetime) -> str:
-        """Format date in Uzbek locale"""
-        if not date:
-            return "Noma'lum"
-
-        return date.strftime("%d.%m.%Y %H:%M")
-
-    @staticmethod
-    def format_time_remaining(target_time: datetime) -> str:
-        """Format time remaining until target"""
+    def format_time_remaining(target_time: datetime, now: Optional[datetime] = None) -> str:
+        """Format time remaining until target; pass now when formatting several times in a row"""
         if not target_time:
             return "Noma'lum"
 
-        now = datetime.utcnow()
-        diff = target_time - now
+        seconds = (target_time - (now or datetime.utcnow())).total_seconds()
 
-        if diff.total_seconds() <= 0:
+        if seconds <= 0:
             return "Vaqt tugagan"
 
-        total_minutes = int(diff.total_seconds() / 60)
+        total_minutes = int(seconds / 60)
 
         if total_minutes < 60:
             return f"{total_minutes} daqiqa"
@@ -169,29 +206,10 @@ class ModernUI:
             return text
         return text[:max_length - 3] + "..."
 
-    @staticmethod
-    def emoji_for_priority(priority: str) -> str:
-        """Get emoji for task priority"""
-        return {
-            "high": "🔴",
-            "medium": "🟡",
-            "low": "🟢"
-        }.get(priority, "⚪")
-
     @staticmethod
     def emoji_for_category(category: str) -> str:
         """Get emoji for task category"""
-        return {
-            "work": "💼",
-            "personal": "👤",
-            "study": "📚",
-            "health": "🏥",
-            "shopping": "🛒",
-            "family": "👨‍👩‍👧‍👦",
-            "finance": "💰",
-            "travel": "✈️",
-            "hobby": "🎨"
-        }.get(category, "📝")
+        return CATEGORY_EMOJI.get(category, "📝")
 
     @staticmethod
     def format_prayer_times(prayer_times: Dict[str, str], region: str) -> str:
@@ -211,15 +229,16 @@ class ModernUI:
             "Isha": "🌃 Xufton"
         }
 
-        text = f"🕌 **NAMAZ VAQTLARI**\n\n"
-        text += f"📍 **Hudud:** {region}\n"
-        text += f"📅 **Sana:** {today}\n"
-        text += f"🕐 **Hozir:** {current_time}\n\n"
+        parts = [
+            "🕌 **NAMAZ VAQTLARI**\n\n"
+            f"📍 **Hudud:** {region}\n"
+            f"📅 **Sana:** {today}\n"
+            f"🕐 **Hozir:** {current_time}\n\n"
+        ]
 
         for prayer, time in prayer_times.items():
-            prayer_name = prayer_names.get(prayer, prayer)
-            text += f"   {prayer_name}: {time}\n"
+            parts.append(f"   {prayer_names.get(prayer, prayer)}: {time}\n")
 
-        text += f"\n🤲 **Allah panohida bo'ling!**"
+        parts.append("\n🤲 **Allah panohida bo'ling!**")
 
-        return text
\ No newline at end of file
+        return "".join(parts)
\ No newline at end of file
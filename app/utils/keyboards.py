@@ -1,8 +1,192 @@
 """Keyboard builders for bot interface"""
 
+from datetime import date, timedelta
+from functools import lru_cache
 from typing import List, Dict, Any
+
+import orjson
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from app.database import Task, Team
+from app.utils.callback_data import TaskCB
+
+
+# Uzbek day names indexed by date.weekday() (Monday == 0)
+UZBEK_DAYS = ("Dushanba", "Seshanba", "Chorshanba", "Payshanba", "Juma", "Shanba", "Yakshanba")
+
+# Static menus never change, so build them once at import and hand out the same markup
+_MAIN_MENU = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="📋 📝 Vazifalarim", callback_data="back_to_main_tasks"),
+        InlineKeyboardButton(text="👥 🤝 Jamoa", callback_data="show_team_features")
+    ],
+    [
+        InlineKeyboardButton(text="👤 📊 Profil", callback_data="view_profile"),
+        InlineKeyboardButton(text="❓ 📚 Yordam", callback_data="show_help")
+    ],
+    [
+        InlineKeyboardButton(text="🕌 📿 Namaz vaqtlari", callback_data="show_prayer_times")
+    ]
+])
+
+_EMPTY_TASKS_MENU = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="➕ Birinchi vazifa", callback_data="add_task")
+    ],
+    [
+        InlineKeyboardButton(text="👥 Jamoa yaratish", callback_data="create_team_quick"),
+        InlineKeyboardButton(text="🕌 Namaz vaqtlari", callback_data="show_prayer_times")
+    ],
+    [
+        InlineKeyboardButton(text="🏠 Bosh sahifa", callback_data="start_fresh")
+    ]
+])
+
+_PROFILE_MENU = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="⚙️ 🔧 Sozlamalar", callback_data="simple_settings"),
+        InlineKeyboardButton(text="📊 📈 Batafsil statistika", callback_data="detailed_stats")
+    ],
+    [
+        InlineKeyboardButton(text="🔔 📱 Bildirishnomalar", callback_data="notification_settings"),
+        InlineKeyboardButton(text="⬅️ 🏠 Bosh sahifa", callback_data="start_fresh")
+    ]
+])
+
+_PRAYER_MENU = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="🔄 Hududni o'zgartirish", callback_data="change_prayer_region"),
+        InlineKeyboardButton(text="⚙️ Bildirishnoma sozlash", callback_data="notification_settings")
+    ],
+    [
+        InlineKeyboardButton(text="⬅️ Orqaga", callback_data="start_fresh")
+    ]
+])
+
+_TEAM_CREATION_MENU = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="➕ Jamoa yaratish", callback_data="create_team_quick"),
+        InlineKeyboardButton(text="🔑 Jamoaga qo'shilish", callback_data="join_team_quick")
+    ],
+    [
+        InlineKeyboardButton(text="⬅️ Orqaga", callback_data="start_fresh")
+    ]
+])
+
+_TASK_CREATED_MENU = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="📋 Barcha vazifalar", callback_data="back_to_main_tasks"),
+        InlineKeyboardButton(text="➕ Yana vazifa qo'shish", callback_data="add_task")
+    ],
+    [
+        InlineKeyboardButton(text="🏠 Bosh sahifa", callback_data="start_fresh")
+    ]
+])
+
+_BACK_TO_MAIN_MENU = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="🏠 Bosh sahifa", callback_data="start_fresh")
+    ]
+])
+
+
+# Per-team menus only depend on the team ID; cache them so repeat views skip rebuilding
+@lru_cache(maxsize=1024)
+def _single_team_menu(team_id: str) -> InlineKeyboardMarkup:
+    """Menu for single team view"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="📝 Vazifalar", callback_data=f"team_tasks_{team_id}"),
+            InlineKeyboardButton(text="👥 A'zolar", callback_data=f"team_members_{team_id}")
+        ],
+        [
+            InlineKeyboardButton(text="⚙️ Boshqarish", callback_data=f"team_admin_{team_id}"),
+            InlineKeyboardButton(text="➕ Yangi jamoa", callback_data="create_team_quick")
+        ],
+        [
+            InlineKeyboardButton(text="⬅️ Orqaga", callback_data="start_fresh")
+        ]
+    ])
+
+
+@lru_cache(maxsize=1024)
+def _team_created_menu(team_id: str) -> InlineKeyboardMarkup:
+    """Menu after team creation"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="👥 Jamoa ma'lumoti", callback_data=f"show_team_{team_id}"),
+            InlineKeyboardButton(text="📤 Kodni ulashish", callback_data=f"share_team_code_{team_id}")
+        ],
+        [
+            InlineKeyboardButton(text="🔑 Yana jamoa yaratish", callback_data="create_team_quick"),
+            InlineKeyboardButton(text="📋 Vazifalar", callback_data="back_to_main_tasks")
+        ]
+    ])
+
+
+@lru_cache(maxsize=1024)
+def _team_joined_menu(team_id: str) -> InlineKeyboardMarkup:
+    """Menu after joining team"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="👥 Jamoa ma'lumoti", callback_data=f"show_team_{team_id}"),
+            InlineKeyboardButton(text="📝 Vazifalar", callback_data=f"team_tasks_{team_id}")
+        ],
+        [
+            InlineKeyboardButton(text="👥 A'zolar", callback_data=f"team_members_{team_id}"),
+            InlineKeyboardButton(text="📋 Mening vazifalarim", callback_data="back_to_main_tasks")
+        ]
+    ])
+
+
+# The day list only changes at midnight, so keep just today's markup
+@lru_cache(maxsize=1)
+def _date_selection_menu(today: date) -> InlineKeyboardMarkup:
+    """Date selection for task creation"""
+    keyboard = [
+        [
+            InlineKeyboardButton(text="📅 Bugun", callback_data="select_date_today"),
+            InlineKeyboardButton(text="📅 Ertaga", callback_data="select_date_tomorrow")
+        ]
+    ]
+
+    # Add next few days
+    for i in range(2, 6):
+        day = today + timedelta(days=i)
+        uzbek_day = UZBEK_DAYS[day.weekday()]
+
+        keyboard.append([
+            InlineKeyboardButton(
+                text=f"📅 {uzbek_day} ({day.day:02d}.{day.month:02d})",
+                callback_data=f"select_date_{day.isoformat()}"
+            )
+        ])
+
+    keyboard.append([
+        InlineKeyboardButton(text="⬅️ Orqaga", callback_data="back_to_main_tasks")
+    ])
+
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+# Hour buttons offered when creating a task, laid out in rows of 3
+_TIME_LABELS = ("09:00", "10:00", "11:00", "12:00", "13:00", "14:00", "15:00", "16:00", "17:00", "18:00", "19:00", "20:00")
+_TIME_ROWS = tuple(_TIME_LABELS[i:i + 3] for i in range(0, len(_TIME_LABELS), 3))
+
+
+@lru_cache(maxsize=64)
+def _time_selection_menu(date: str) -> InlineKeyboardMarkup:
+    """Time selection for task creation"""
+    keyboard = [
+        [
+            InlineKeyboardButton(text=f"🕐 {time}", callback_data=f"select_time_{date}_{time}")
+            for time in row
+        ]
+        for row in _TIME_ROWS
+    ]
+    keyboard.append([
+        InlineKeyboardButton(text="⬅️ Orqaga", callback_data="add_task")
+    ])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
 class KeyboardBuilder:
@@ -13,19 +197,7 @@ class KeyboardBuilder:
 
     def main_menu(self) -> InlineKeyboardMarkup:
         """Main menu keyboard"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="📋 📝 Vazifalarim", callback_data="back_to_main_tasks"),
-                InlineKeyboardButton(text="👥 🤝 Jamoa", callback_data="show_team_features")
-            ],
-            [
-                InlineKeyboardButton(text="👤 📊 Profil", callback_data="view_profile"),
-                InlineKeyboardButton(text="❓ 📚 Yordam", callback_data="show_help")
-            ],
-            [
-                InlineKeyboardButton(text="🕌 📿 Namaz vaqtlari", callback_data="show_prayer_times")
-            ]
-        ])
+        return _MAIN_MENU
 
     def tasks_menu(self, tasks: List[Task]) -> InlineKeyboardMarkup:
         """Tasks menu with task actions"""
@@ -37,15 +209,14 @@ class KeyboardBuilder:
             InlineKeyboardButton(text="📊 Statistika", callback_data="view_profile")
         ])
 
-        # Add task completion buttons for first few tasks
-        if tasks:
-            for task in tasks[:3]:  # Show max 3 task buttons
-                keyboard.append([
-                    InlineKeyboardButton(
-                        text=f"✅ {task.name[:25]}...",
-                        callback_data=f"complete_task_{task.id}"
-                    )
-                ])
+        # Add task completion buttons for first few tasks (max 3); only elide names that don't fit
+        keyboard.extend(
+            [InlineKeyboardButton(
+                text="✅ " + (name[:22] + "..." if len(name) > 25 else name),
+                callback_data=TaskCB(task_id=task_id).pack()
+            )]
+            for task_id, name in ((task.id, task.name) for task in tasks[:3])
+        )
 
         # Add navigation
         keyboard.append([
@@ -57,71 +228,23 @@ class KeyboardBuilder:
 
     def empty_tasks_menu(self) -> InlineKeyboardMarkup:
         """Menu when no tasks exist"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="➕ Birinchi vazifa", callback_data="add_task")
-            ],
-            [
-                InlineKeyboardButton(text="👥 Jamoa yaratish", callback_data="create_team_quick"),
-                InlineKeyboardButton(text="🕌 Namaz vaqtlari", callback_data="show_prayer_times")
-            ],
-            [
-                InlineKeyboardButton(text="🏠 Bosh sahifa", callback_data="start_fresh")
-            ]
-        ])
+        return _EMPTY_TASKS_MENU
 
     def profile_menu(self) -> InlineKeyboardMarkup:
         """Profile menu"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="⚙️ 🔧 Sozlamalar", callback_data="simple_settings"),
-                InlineKeyboardButton(text="📊 📈 Batafsil statistika", callback_data="detailed_stats")
-            ],
-            [
-                InlineKeyboardButton(text="🔔 📱 Bildirishnomalar", callback_data="notification_settings"),
-                InlineKeyboardButton(text="⬅️ 🏠 Bosh sahifa", callback_data="start_fresh")
-            ]
-        ])
+        return _PROFILE_MENU
 
     def prayer_menu(self) -> InlineKeyboardMarkup:
         """Prayer times menu"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="🔄 Hududni o'zgartirish", callback_data="change_prayer_region"),
-                InlineKeyboardButton(text="⚙️ Bildirishnoma sozlash", callback_data="notification_settings")
-            ],
-            [
-                InlineKeyboardButton(text="⬅️ Orqaga", callback_data="start_fresh")
-            ]
-        ])
+        return _PRAYER_MENU
 
     def team_creation_menu(self) -> InlineKeyboardMarkup:
         """Team creation menu"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="➕ Jamoa yaratish", callback_data="create_team_quick"),
-                InlineKeyboardButton(text="🔑 Jamoaga qo'shilish", callback_data="join_team_quick")
-            ],
-            [
-                InlineKeyboardButton(text="⬅️ Orqaga", callback_data="start_fresh")
-            ]
-        ])
+        return _TEAM_CREATION_MENU
 
     def single_team_menu(self, team_id: str) -> InlineKeyboardMarkup:
         """Menu for single team view"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="📝 Vazifalar", callback_data=f"team_tasks_{team_id}"),
-                InlineKeyboardButton(text="👥 A'zolar", callback_data=f"team_members_{team_id}")
-            ],
-            [
-                InlineKeyboardButton(text="⚙️ Boshqarish", callback_data=f"team_admin_{team_id}"),
-                InlineKeyboardButton(text="➕ Yangi jamoa", callback_data="create_team_quick")
-            ],
-            [
-                InlineKeyboardButton(text="⬅️ Orqaga", callback_data="start_fresh")
-            ]
-        ])
+        return _single_team_menu(team_id)
 
     def multiple_teams_menu(self, teams: List[Team]) -> InlineKeyboardMarkup:
         """Menu for multiple teams selection"""
@@ -150,132 +273,37 @@ class KeyboardBuilder:
 
     def date_selection_menu(self) -> InlineKeyboardMarkup:
         """Date selection for task creation"""
-        from datetime import datetime, timedelta
-
-        today = datetime.now()
-        tomorrow = today + timedelta(days=1)
-
-        keyboard = [
-            [
-                InlineKeyboardButton(text="📅 Bugun", callback_data="select_date_today"),
-                InlineKeyboardButton(text="📅 Ertaga", callback_data="select_date_tomorrow")
-            ]
-        ]
-
-        # Add next few days
-        for i in range(2, 6):
-            date = today + timedelta(days=i)
-            day_name = date.strftime("%A")  # Day name
-            day_num = date.strftime("%d.%m")  # Day and month
-
-            # Translate day names to Uzbek
-            day_translations = {
-                "Monday": "Dushanba",
-                "Tuesday": "Seshanba",
-                "Wednesday": "Chorshanba",
-                "Thursday": "Payshanba",
-                "Friday": "Juma",
-                "Saturday": "Shanba",
-                "Sunday": "Yakshanba"
-            }
-
-            uzbek_day = day_translations.get(day_name, day_name)
-
-            keyboard.append([
-                InlineKeyboardButton(
-                    text=f"📅 {uzbek_day} ({day_num})",
-                    callback_data=f"select_date_{date.strftime('%Y-%m-%d')}"
-                )
-            ])
-
-        keyboard.append([
-            InlineKeyboardButton(text="⬅️ Orqaga", callback_data="back_to_main_tasks")
-        ])
-
-        return InlineKeyboardMarkup(inline_keyboard=keyboard)
+        return _date_selection_menu(date.today())
 
     def time_selection_menu(self, date: str) -> InlineKeyboardMarkup:
         """Time selection for task creation"""
-        times = ["09:00", "10:00", "11:00", "12:00", "13:00", "14:00", "15:00", "16:00", "17:00", "18:00", "19:00", "20:00"]
-
-        keyboard = []
-
-        # Add times in rows of 3
-        for i in range(0, len(times), 3):
-            row = []
-            for j in range(3):
-                if i + j < len(times):
-                    time = times[i + j]
-                    row.append(
-                        InlineKeyboardButton(
-                            text=f"🕐 {time}",
-                            callback_data=f"select_time_{date}_{time}"
-                        )
-                    )
-            keyboard.append(row)
-
-        keyboard.append([
-            InlineKeyboardButton(text="⬅️ Orqaga", callback_data="add_task")
-        ])
-
-        return InlineKeyboardMarkup(inline_keyboard=keyboard)
+        return _time_selection_menu(date)
 
     def task_created_menu(self) -> InlineKeyboardMarkup:
         """Menu after task creation"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="📋 Barcha vazifalar", callback_data="back_to_main_tasks"),
-                InlineKeyboardButton(text="➕ Yana vazifa qo'shish", callback_data="add_task")
-            ],
-            [
-                InlineKeyboardButton(text="🏠 Bosh sahifa", callback_data="start_fresh")
-            ]
-        ])
+        return _TASK_CREATED_MENU
 
     def team_created_menu(self, team_id: str) -> InlineKeyboardMarkup:
         """Menu after team creation"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="👥 Jamoa ma'lumoti", callback_data=f"show_team_{team_id}"),
-                InlineKeyboardButton(text="📤 Kodni ulashish", callback_data=f"share_team_code_{team_id}")
-            ],
-            [
-                InlineKeyboardButton(text="🔑 Yana jamoa yaratish", callback_data="create_team_quick"),
-                InlineKeyboardButton(text="📋 Vazifalar", callback_data="back_to_main_tasks")
-            ]
-        ])
+        return _team_created_menu(team_id)
 
     def team_joined_menu(self, team_id: str) -> InlineKeyboardMarkup:
         """Menu after joining team"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="👥 Jamoa ma'lumoti", callback_data=f"show_team_{team_id}"),
-                InlineKeyboardButton(text="📝 Vazifalar", callback_data=f"team_tasks_{team_id}")
-            ],
-            [
-                InlineKeyboardButton(text="👥 A'zolar", callback_data=f"team_members_{team_id}"),
-                InlineKeyboardButton(text="📋 Mening vazifalarim", callback_data="back_to_main_tasks")
-            ]
-        ])
+        return _team_joined_menu(team_id)
 
     def back_to_main_menu(self) -> InlineKeyboardMarkup:
         """Simple back to main menu"""
-        return InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="🏠 Bosh sahifa", callback_data="start_fresh")
-            ]
-        ])
+        return _BACK_TO_MAIN_MENU
 
     def encode_callback(self, action: str, data: Dict[str, Any]) -> str:
         """Encode callback data"""
-        import json
         callback_data = {"action": action, "data": data}
-        return json.dumps(callback_data, separators=(',', ':'))[:64]  # Telegram limit
+        # Telegram's limit is 64 bytes; orjson emits raw UTF-8, so cut the bytes, not the characters
+        return orjson.dumps(callback_data)[:64].decode("utf-8", "ignore")
 
     def decode_callback(self, callback_data: str) -> Dict[str, Any]:
         """Decode callback data"""
-        import json
         try:
-            return json.loads(callback_data)
-        except:
-            return {"action": callback_data, "data": {}}
\ No newline at end of file
+            return orjson.loads(callback_data)
+        except orjson.JSONDecodeError:
+            return {"action": callback_data, "data": {}}
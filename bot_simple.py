@@ -9,24 +9,34 @@ from aiogram import Bot, Dispatcher
 from aiogram.filters import Command
 
 from app.config import settings
-from app.database import init_db
+from app.logging_setup import setup_logging
+from app.database import init_db, close_db
 from app.handlers import router
+from app.middleware.auth import AuthMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
 from app.services.notification_service import NotificationService
+from app.services.prayer_service import init_http_client, close_http_client
+from app.utils.background import wait_for_background_tasks
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 async def main():
     # Initialize database
     await init_db()
     logger.info("✅ Database initialized")
+    await init_http_client()
 
     # Create bot and dispatcher
     bot = Bot(token=settings.BOT_TOKEN)
+    bot.session.middleware(RateLimitMiddleware())
     dp = Dispatcher()
 
-    # Include handlers
+    # Include handlers; AuthMiddleware loads the user once and hands it to handlers as `user`
+    auth_middleware = AuthMiddleware()
+    dp.message.outer_middleware(auth_middleware)
+    dp.callback_query.outer_middleware(auth_middleware)
     dp.include_router(router)
 
     # Initialize notification service with bot instance
@@ -43,7 +53,16 @@ async def main():
         await dp.start_polling(bot)
     finally:
         await notification_service.stop()
+        await wait_for_background_tasks()
         await bot.session.close()
+        await close_http_client()
+        await close_db()
 
 if __name__ == "__main__":
+    # libuv-based loop where available (uvloop has no Windows build)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())
\ No newline at end of file
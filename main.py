@@ -9,30 +9,29 @@ import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import ORJSONResponse, Response
 from aiogram import Bot, Dispatcher
 from aiogram.types import Update
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiohttp import web
 
 from app.config import settings
+from app.logging_setup import setup_logging
 from app.handlers import router
 from app.database import init_db, close_db
+from app.services.prayer_service import init_http_client, close_http_client
+from app.utils.background import wait_for_background_tasks
 from app.services.notification_service import NotificationService
 from app.middleware.error import ErrorMiddleware
 from app.middleware.auth import AuthMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Global instances
-bot = Bot(token=settings.BOT_TOKEN)
-dp = Dispatcher()
-notification_service = NotificationService()
-
+# Static body for the health check, serialized once instead of on every hit
+ROOT_RESPONSE_BODY = b'{"status":"running","bot":"Telegram Todo Bot","version":"2.0.0"}'
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -42,8 +41,22 @@ async def lifespan(app: FastAPI):
 
     # Initialize database
     await init_db()
-
-    # Setup bot
+    await init_http_client()
+
+    # Bot, dispatcher and scheduler live on app.state so importing this module
+    # (uvicorn reload, tooling) doesn't open a client session
+    bot = Bot(token=settings.BOT_TOKEN)
+    bot.session.middleware(RateLimitMiddleware())
+    dp = Dispatcher()
+    notification_service = NotificationService(bot)
+    app.state.bot = bot
+    app.state.dp = dp
+    app.state.notification_service = notification_service
+
+    # Setup bot; AuthMiddleware loads the user once and hands it to handlers as `user`
+    auth_middleware = AuthMiddleware()
+    dp.message.outer_middleware(auth_middleware)
+    dp.callback_query.outer_middleware(auth_middleware)
     dp.include_router(router)
 
     # Start notification service
@@ -57,8 +70,10 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 Shutting down...")
     await notification_service.stop()
+    await wait_for_background_tasks()
     await bot.delete_webhook()
     await bot.session.close()
+    await close_http_client()
     await close_db()
     logger.info("✅ Shutdown complete")
 
@@ -68,6 +83,7 @@ app = FastAPI(
     title="Telegram Todo Bot API",
     description="A task management bot with team collaboration features",
     version="2.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -75,21 +91,19 @@ app = FastAPI(
 @app.get("/")
 async def root():
     """Health check endpoint"""
-    return {
-        "status": "running",
-        "bot": "Telegram Todo Bot",
-        "version": "2.0.0"
-    }
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
 
 
 @app.post("/webhook")
 async def webhook(request: Request):
     """Handle Telegram webhook updates"""
     try:
-        data = await request.json()
-        update = Update(**data)
-        await dp.feed_update(bot, update)
-        return {"status": "ok"}
+        # Validate the raw body straight into the model, skipping the intermediate dict
+        bot = request.app.state.bot
+        update = Update.model_validate_json(await request.body(), context={"bot": bot})
+        await request.app.state.dp.feed_update(bot, update)
+        # Telegram only looks at the status code
+        return Response(status_code=204)
     except Exception as e:
         logger.error(f"Webhook error: {e}")
         raise HTTPException(status_code=400, detail="Invalid update")
@@ -108,5 +122,7 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        reload=True,
+        loop="auto",  # uvloop when installed (not on Windows), asyncio otherwise
+        http="httptools"
     )
\ No newline at end of file
@@ -5,18 +5,31 @@ Migrates data from Node.js JSON format to Python SQLAlchemy models
 """
 
 import asyncio
-import json
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache, partial
 from pathlib import Path
 
+import orjson
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
 import sys
 sys.path.append('.')
-from app.database import init_db, async_session_factory, User, Task, Team, TeamMember
+from app.logging_setup import setup_logging
+from app.database import init_db, async_session_factory, recount_team_counters, User, Task, Team, TeamMember
 
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+try:
+    import ijson
+except ImportError:  # Streaming is optional; without it the dump is loaded in one go
+    ijson = None
+
+# Users/teams parsed before their rows are written and dropped from memory
+MIGRATION_BATCH_SIZE = 1000
+
 
 async def migrate_data():
     """Main migration function"""
@@ -32,190 +45,244 @@ async def migrate_data():
         "src/data/database.json"  # Another possible location
     ]
 
-    data = None
-    for json_file in json_files:
-        if Path(json_file).exists():
-            logger.info(f"📂 Found data file: {json_file}")
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            break
-
-    if not data:
+    json_file = next((path for path in json_files if Path(path).exists()), None)
+    if json_file is None:
         logger.warning("⚠️ No JSON data file found. Creating fresh database.")
         return
 
-    logger.info(f"📊 Data loaded: {len(data.get('users', {}))} users")
+    logger.info("📂 Found data file: %s", json_file)
 
     async with async_session_factory() as session:
-        # Migrate users
-        users_data = data.get('users', {})
+        # One query per table up front instead of a lookup per record
+        existing_user_ids = set((await session.execute(select(User.id))).scalars())
+        existing_team_ids = set((await session.execute(select(Team.id))).scalars())
+
+        # Rows are collected as plain dicts and written with one INSERT per table per batch
+        users_rows = []
+        teams_rows = []
+        members_rows = []
+        tasks_rows = []
         migrated_users = 0
+        migrated_teams = 0
+        skipped_tasks = 0
 
-        for user_id, user_data in users_data.items():
+        async def flush():
+            """Write the collected rows and start a new batch"""
+            nonlocal migrated_users, migrated_teams
+
+            # Parents before children so foreign keys resolve
+            for model, rows in ((User, users_rows), (Team, teams_rows), (TeamMember, members_rows), (Task, tasks_rows)):
+                if rows:
+                    await session.execute(sqlite_insert(model).on_conflict_do_nothing(), rows)
+
+            migrated_users += len(users_rows)
+            migrated_teams += len(teams_rows)
+            for rows in (users_rows, teams_rows, members_rows, tasks_rows):
+                rows.clear()
+
+        # Migrate users
+        for raw_user_id, user_data in iter_section(json_file, 'users'):
             try:
+                user_id = int(raw_user_id)
+
                 # Check if user already exists
-                existing_user = await session.get(User, user_id)
-                if existing_user:
-                    logger.debug(f"User {user_id} already exists, skipping...")
+                if user_id in existing_user_ids:
+                    logger.debug("User %s already exists, skipping...", user_id)
                     continue
 
-                # Create user
-                user = User(
-                    id=user_id,
-                    first_name=user_data.get('firstName', 'Unknown'),
-                    last_name=user_data.get('lastName'),
-                    username=user_data.get('username'),
-                    prayer_region=user_data.get('prayerRegion', 'Toshkent'),
-                    notifications_enabled=user_data.get('preferences', {}).get('notifications', {}).get('tasks', True),
-                    prayer_notifications_enabled=user_data.get('preferences', {}).get('notifications', {}).get('prayer', True),
-                    registration_date=parse_date(user_data.get('activity', {}).get('registrationDate')),
-                    last_activity=parse_date(user_data.get('activity', {}).get('lastActivity')),
-                    total_tasks_created=user_data.get('activity', {}).get('totalTasksCreated', 0),
-                    blocked_bot=user_data.get('activity', {}).get('blockedBot', False),
-                    blocked_at=parse_date(user_data.get('activity', {}).get('blockedAt'))
-                )
-
-                session.add(user)
-                migrated_users += 1
-
-                # Migrate user tasks
+                activity = user_data.get('activity', {})
+                notifications = user_data.get('preferences', {}).get('notifications', {})
+
+                users_rows.append({
+                    'id': user_id,
+                    'first_name': user_data.get('firstName', 'Unknown'),
+                    'last_name': user_data.get('lastName'),
+                    'username': user_data.get('username'),
+                    'prayer_region': user_data.get('prayerRegion', 'Toshkent'),
+                    'notifications_enabled': notifications.get('tasks', True),
+                    'prayer_notifications_enabled': notifications.get('prayer', True),
+                    'registration_date': parse_date(activity.get('registrationDate')),
+                    'last_activity': parse_date(activity.get('lastActivity')),
+                    'total_tasks_created': activity.get('totalTasksCreated', 0),
+                    'blocked_bot': activity.get('blockedBot', False),
+                    'blocked_at': parse_date(activity.get('blockedAt'))
+                })
+
+                # Migrate user tasks; records that can't be stored are dropped up front
                 tasks_data = user_data.get('tasks', [])
-                migrated_tasks = 0
-
-                for task_data in tasks_data:
-                    try:
-                        task = Task(
-                            user_id=user_id,
-                            name=task_data.get('name', 'Untitled Task'),
-                            notes=task_data.get('notes', ''),
-                            category=task_data.get('category', 'personal'),
-                            priority=task_data.get('priority', 'medium'),
-                            due_date=parse_date(task_data.get('date')),
-                            created_at=parse_date(task_data.get('createdAt')),
-                            completed=task_data.get('completed', False),
-                            completed_at=parse_date(task_data.get('completedAt')),
-                            # Notification flags
-                            notification_1day_sent=task_data.get('notifications', {}).get('sent1Day', False),
-                            notification_1hour_sent=task_data.get('notifications', {}).get('sent1Hour', False),
-                            notification_15min_sent=task_data.get('notifications', {}).get('sent15Min', False),
-                            notification_due_sent=task_data.get('notifications', {}).get('sentDue', False)
-                        )
-
-                        session.add(task)
-                        migrated_tasks += 1
-
-                    except Exception as e:
-                        logger.error(f"Failed to migrate task for user {user_id}: {e}")
-
-                logger.info(f"✅ Migrated user {user_id} with {migrated_tasks} tasks")
+                user_tasks = [row for row in map(partial(_task_row, user_id=user_id), tasks_data) if row is not None]
+                tasks_rows.extend(user_tasks)
+                skipped_tasks += len(tasks_data) - len(user_tasks)
+
+                logger.info("✅ Migrated user %s with %d tasks", user_id, len(user_tasks))
 
             except Exception as e:
-                logger.error(f"Failed to migrate user {user_id}: {e}")
+                logger.error("Failed to migrate user %s: %s", raw_user_id, e)
 
-        # Migrate teams
-        teams_data = data.get('teamData', {})
-        migrated_teams = 0
+            if len(users_rows) >= MIGRATION_BATCH_SIZE:
+                await flush()
 
-        for team_id, team_data in teams_data.items():
+        # Migrate teams
+        for team_id, team_data in iter_section(json_file, 'teamData'):
             try:
                 # Check if team already exists
-                existing_team = await session.get(Team, team_id)
-                if existing_team:
-                    logger.debug(f"Team {team_id} already exists, skipping...")
+                if team_id in existing_team_ids:
+                    logger.debug("Team %s already exists, skipping...", team_id)
                     continue
 
-                # Create team
-                team = Team(
-                    id=team_id,
-                    name=team_data.get('name', 'Unnamed Team'),
-                    admin_id=team_data.get('admin'),
-                    created_at=parse_date(team_data.get('createdAt')),
-                    allow_member_invite=team_data.get('settings', {}).get('allowMemberInvite', False),
-                    require_approval=team_data.get('settings', {}).get('requireApproval', True)
-                )
+                admin_id = parse_user_id(team_data.get('admin'))
+                if admin_id is None:
+                    logger.error("Team %s has no valid admin, skipping...", team_id)
+                    continue
 
-                session.add(team)
+                settings = team_data.get('settings', {})
+
+                teams_rows.append({
+                    'id': team_id,
+                    'name': team_data.get('name', 'Unnamed Team'),
+                    'admin_id': admin_id,
+                    'created_at': parse_date(team_data.get('createdAt')),
+                    'allow_member_invite': settings.get('allowMemberInvite', False),
+                    'require_approval': settings.get('requireApproval', True)
+                })
 
                 # Add team members
-                members = team_data.get('members', [])
-                for member_id in members:
-                    member = TeamMember(
-                        team_id=team_id,
-                        user_id=member_id,
-                        is_admin=(member_id == team_data.get('admin'))
-                    )
-                    session.add(member)
+                members = [member_id for member_id in map(parse_user_id, team_data.get('members', [])) if member_id is not None]
+                members_rows.extend(
+                    {'team_id': team_id, 'user_id': member_id, 'is_admin': member_id == admin_id}
+                    for member_id in members
+                )
 
                 # Migrate team tasks
                 shared_tasks = team_data.get('sharedTasks', [])
-                for task_data in shared_tasks:
-                    try:
-                        task = Task(
-                            user_id=task_data.get('assignedBy', team_data.get('admin')),
-                            team_id=team_id,
-                            name=task_data.get('name', 'Untitled Team Task'),
-                            notes=task_data.get('notes', ''),
-                            category=task_data.get('category', 'team'),
-                            priority=task_data.get('priority', 'medium'),
-                            due_date=parse_date(task_data.get('date')),
-                            created_at=parse_date(task_data.get('createdAt')),
-                            completed=task_data.get('completed', False),
-                            completed_at=parse_date(task_data.get('completedAt')),
-                            assigned_by=task_data.get('assignedBy'),
-                            completed_by=task_data.get('completedBy')
-                        )
-
-                        session.add(task)
-
-                    except Exception as e:
-                        logger.error(f"Failed to migrate team task for team {team_id}: {e}")
-
-                migrated_teams += 1
-                logger.info(f"✅ Migrated team {team_id} ({team_data.get('name')}) with {len(members)} members")
+                team_tasks = [
+                    row for row in map(partial(_task_row, user_id=admin_id, team_id=team_id), shared_tasks)
+                    if row is not None
+                ]
+                tasks_rows.extend(team_tasks)
+                skipped_tasks += len(shared_tasks) - len(team_tasks)
+
+                logger.info("✅ Migrated team %s (%s) with %d members", team_id, team_data.get('name'), len(members))
 
             except Exception as e:
-                logger.error(f"Failed to migrate team {team_id}: {e}")
+                logger.error("Failed to migrate team %s: %s", team_id, e)
+
+            if len(teams_rows) >= MIGRATION_BATCH_SIZE:
+                await flush()
+
+        await flush()
+
+        # Team counters are denormalized; derive them from the rows just inserted
+        await session.execute(recount_team_counters())
 
         # Commit all changes
         await session.commit()
 
-        logger.info(f"🎉 Migration complete!")
-        logger.info(f"   👥 Users migrated: {migrated_users}")
-        logger.info(f"   🏢 Teams migrated: {migrated_teams}")
+        logger.info("🎉 Migration complete!")
+        logger.info("   👥 Users migrated: %d", migrated_users)
+        logger.info("   🏢 Teams migrated: %d", migrated_teams)
+        if skipped_tasks:
+            logger.warning("   ⚠️ Tasks skipped (invalid or missing due date): %d", skipped_tasks)
 
         # Print summary
         from app.database import get_stats
         stats = await get_stats()
-        logger.info(f"📊 Final database stats: {stats}")
+        logger.info("📊 Final database stats: %s", stats)
+
+
+def iter_section(json_file, section):
+    """Yield the (key, value) pairs of a top-level object in the dump"""
+    if ijson is None:
+        yield from _load_dump(json_file).get(section, {}).items()
+        return
+
+    # Stream the section so only the current record is held in memory
+    with open(json_file, 'rb') as f:
+        yield from ijson.kvitems(f, section, use_float=True)
+
+
+@lru_cache(maxsize=1)
+def _load_dump(json_file):
+    """Read the whole dump (used when ijson isn't installed)"""
+    with open(json_file, 'rb') as f:
+        return orjson.loads(f.read())
+
 
+def _task_row(task_data, *, user_id, team_id=None):
+    """Build a tasks row from a Node.js task record, or None if it can't be stored"""
+    if not isinstance(task_data, dict):
+        return None
+
+    # tasks.due_date is NOT NULL; one bad row would otherwise fail the whole batch
+    due_date = parse_date(task_data.get('date'))
+    if due_date is None:
+        return None
 
+    if team_id is None:
+        name, category = task_data.get('name', 'Untitled Task'), task_data.get('category', 'personal')
+        assigned_by = completed_by = None
+    else:
+        # Team tasks belong to whoever assigned them, falling back to the team admin
+        name, category = task_data.get('name', 'Untitled Team Task'), task_data.get('category', 'team')
+        assigned_by = parse_user_id(task_data.get('assignedBy'))
+        completed_by = parse_user_id(task_data.get('completedBy'))
+        user_id = assigned_by or user_id
+
+    notifications = task_data.get('notifications') or {}
+    return {
+        'user_id': user_id,
+        'team_id': team_id,
+        'name': name,
+        'notes': task_data.get('notes', ''),
+        'category': category,
+        'priority': task_data.get('priority', 'medium'),
+        'due_date': due_date,
+        'created_at': parse_date(task_data.get('createdAt')),
+        'completed': task_data.get('completed', False),
+        'completed_at': parse_date(task_data.get('completedAt')),
+        'assigned_by': assigned_by,
+        'completed_by': completed_by,
+        # Notification flags
+        'notification_1day_sent': notifications.get('sent1Day', False),
+        'notification_1hour_sent': notifications.get('sent1Hour', False),
+        'notification_15min_sent': notifications.get('sent15Min', False),
+        'notification_due_sent': notifications.get('sentDue', False)
+    }
+
+
+def parse_user_id(value):
+    """Convert a Node.js (string) user ID to the integer Telegram ID"""
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=8192)
 def parse_date(date_str):
     """Parse date string to datetime object"""
     if not date_str:
         return None
 
     try:
-        # Try different date formats
-        formats = [
-            '%Y-%m-%dT%H:%M:%S.%fZ',  # ISO format with microseconds
-            '%Y-%m-%dT%H:%M:%SZ',     # ISO format
-            '%Y-%m-%d %H:%M:%S',      # Standard format
-            '%Y-%m-%d',               # Date only
-        ]
-
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
-
-        # If all formats fail, try parsing as timestamp
+        # ISO 8601 in all its forms (with or without time, "Z" suffix, etc.)
+        try:
+            parsed = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+            if parsed.tzinfo is not None:
+                # Stored datetimes are naive UTC
+                parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+            return parsed
+        except ValueError:
+            pass
+
+        # Otherwise try parsing as a millisecond timestamp
         return datetime.fromtimestamp(float(date_str) / 1000)
 
     except Exception:
-        logger.warning(f"Failed to parse date: {date_str}")
+        logger.warning("Failed to parse date: %s", date_str)
         return None
 
-
 if __name__ == "__main__":
     asyncio.run(migrate_data())
\ No newline at end of file
@@ -12,5 +12,7 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
-        log_level=settings.LOG_LEVEL.lower()
+        log_level=settings.LOG_LEVEL.lower(),
+        loop="auto",  # uvloop when installed (not on Windows), asyncio otherwise
+        http="httptools"
     )
\ No newline at end of file